@@ -1,13 +1,34 @@
 import adsk.core
 import adsk.fusion
 import traceback
+import csv
+import json
+from .design_walker import walk_parts
+from .occurrence_index import build_occurrence_index
 
-def is_part(component):
-    return component.occurrences.count == 0
+REPORT_FIELDS = ["name", "material", "occurrence_count", "paths"]
 
-# def resolve_parents(component, parentList):
-#     if component.assemblyContext is not None:
-#         parentList.append(component.assemblyContext.component)
+def build_report(components, occurrence_index) -> list:
+    report = list()
+    for component, material_name in components:
+        report.append({
+            "name": component.name,
+            "material": material_name,
+            "occurrence_count": occurrence_index.count(component),
+            "paths": occurrence_index.occurrence_paths(component),
+        })
+    return report
+
+def save_report(filename: str, report: list):
+    if filename.lower().endswith(".csv"):
+        with open(filename, "w", newline="") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for row in report:
+                writer.writerow(dict(row, paths=";".join(row["paths"])))
+    else:
+        with open(filename, "w") as report_file:
+            json.dump(report, report_file, indent=2)
 
 def run(context):
     ui = None
@@ -21,26 +42,36 @@ def run(context):
             ui.messageBox('Active product is not a Fusion 360 design', 'Invalid Design')
             return
 
-        # Get all components in the design
-        components = design.allComponents
-
         default_material_components = list()
-        # Iterate through each component and check if it has a material
-        for component in components:
-            if is_part(component):
-                material = component.material
-                if material.name == "Default":
-                    default_material_components.append(component.name)
-                    # parents = list()
-                    # resolve_parents(component, parents)
-                    # ui.messageBox(f"parents")
-                # if material is not None:
-                # ui.messageBox(f"component: {component.name} : material: {material.name}")
+        # Walk the parts of the design and check if each has a material
+        for component, material_name, _ in walk_parts(design):
+            if material_name == "Default":
+                default_material_components.append((component, material_name))
 
         if len(default_material_components) == 0:
             ui.messageBox('Material check completed.', 'Material Check Success')
-        else:
-            ui.messageBox("The following components have not been assigned a material:\n\t{}".format("\n\t".join(default_material_components)), "Material Check Failed")
+            return
+
+        # Record the full path of every occurrence in one walk down the assembly
+        occurrence_index = build_occurrence_index(design.rootComponent)
+        report = build_report(default_material_components, occurrence_index)
+
+        failed = list()
+        for row in report:
+            location = row["paths"][0] if len(row["paths"]) > 0 else row["name"]
+            failed.append(f"{location} (x{row['occurrence_count']})")
+
+        result = ui.messageBox(
+            "The following components have not been assigned a material:\n\t{}\n\nSave a report?".format("\n\t".join(failed)),
+            "Material Check Failed",
+            adsk.core.MessageBoxButtonTypes.YesNoButtonType
+        )
+        if result == adsk.core.DialogResults.DialogYes:
+            fileDialog = ui.createFileDialog()
+            fileDialog.title = "Material Check Report"
+            fileDialog.filter = "JSON (*.json);;CSV (*.csv)"
+            if fileDialog.showSave() == adsk.core.DialogResults.DialogOK:
+                save_report(fileDialog.filename, report)
 
     except:
         if ui:
@@ -48,4 +79,4 @@ def run(context):
 
 # Run the script
 if __name__ == '__main__':
-    run(None)
\ No newline at end of file
+    run(None)
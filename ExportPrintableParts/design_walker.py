@@ -0,0 +1,42 @@
+# Fusion loads every script folder on its own, so CheckMaterials and ExportPrintableParts
+# each carry a copy of this module. Keep the two in sync.
+import adsk.core
+import adsk.fusion
+
+
+def is_part(component: adsk.fusion.Component) -> bool:
+    return component.occurrences.count == 0
+
+
+def walk_parts(design: adsk.fusion.Design):
+    """Lazily yields (component, material name, parent path) for every part in the design.
+
+    Parts are found by walking the occurrence tree depth first, each part and subassembly is
+    visited only once however often it is used, and nothing but the ids of visited components
+    is kept. The parent path is the '/' separated occurrence names leading to the first use
+    of the part.
+    """
+    root = design.rootComponent
+    if is_part(root):
+        yield root, root.material.name, ""
+        return
+
+    seen = set()
+    stack = [("", iter(root.occurrences))]
+    while stack:
+        parent_path, occurrences = stack[-1]
+        occurrence = next(occurrences, None)
+        if occurrence is None:
+            stack.pop()
+            continue
+
+        component = occurrence.component
+        if component.id in seen:
+            continue
+        seen.add(component.id)
+
+        if is_part(component):
+            yield component, component.material.name, parent_path
+        else:
+            path = f"{parent_path}/{occurrence.name}" if parent_path else occurrence.name
+            stack.append((path, iter(component.occurrences)))
@@ -0,0 +1,78 @@
+import adsk.core
+import adsk.fusion
+import json
+import os
+import shutil
+
+MANIFEST_NAME = "export_manifest.json"
+
+
+def geometry_fingerprint(part: adsk.fusion.Component) -> list:
+    """Cheap summary of a part's geometry that changes whenever the geometry does.
+
+    revisionId changes on any edit to the component, the remaining values guard against
+    edits it does not cover.
+    """
+    bodies = part.bRepBodies
+    face_count = 0
+    for body in bodies:
+        face_count += body.faces.count
+
+    box = part.boundingBox
+    return [
+        part.revisionId,
+        bodies.count,
+        face_count,
+        [round(v, 6) for v in (box.minPoint.x, box.minPoint.y, box.minPoint.z)],
+        [round(v, 6) for v in (box.maxPoint.x, box.maxPoint.y, box.maxPoint.z)],
+    ]
+
+
+def part_fingerprint(part: adsk.fusion.Component, mesh_quality: int, compressed: bool = False) -> str:
+    """Fingerprint that changes whenever the exported STL would, including switching between
+    plain and gzipped files.
+    """
+    return json.dumps(geometry_fingerprint(part) + [mesh_quality, compressed])
+
+
+def load_manifest(folder: str) -> dict:
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError):
+        # A broken manifest only costs a full export
+        return {}
+
+
+def save_manifest(folder: str, manifest: dict):
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    os.replace(temp_path, manifest_path)
+
+
+def reuse_previous_export(manifest: dict, part_id: str, fingerprint: str, filename: str) -> bool:
+    """Link or copy the previous export of an unchanged part to filename.
+
+    Returns False if the part has to be exported again.
+    """
+    entry = manifest.get(part_id)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        return False
+
+    previous_filename = entry["path"]
+    if not os.path.exists(previous_filename):
+        return False
+
+    try:
+        os.link(previous_filename, filename)
+    except OSError:
+        # Hard links need the same volume and a filesystem that supports them
+        shutil.copyfile(previous_filename, filename)
+
+    return True
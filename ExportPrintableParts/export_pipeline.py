@@ -0,0 +1,58 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+def run_export_pipeline(
+        jobs: list,
+        extract_mesh: Callable,
+        write_mesh: Callable,
+        *,
+        workers: int = 4,
+        max_pending: int = 8,
+        on_progress: Callable = None,
+        is_cancelled: Callable = None
+) -> int:
+    """Exports parts in two overlapping stages.
+
+    Meshes are extracted one at a time on the calling thread, since the Fusion API may only
+    be used from the main thread, while a bounded pool of worker threads writes the
+    previously extracted meshes to disk.
+
+    Arguments:
+    jobs -- List of (part, target) pairs, target usually being the filename to write to.
+    extract_mesh -- Called with a part on the calling thread, returns its mesh.
+    write_mesh -- Called with a mesh and its target on a worker thread.
+    workers -- Number of writer threads. Writes happen in job order when this is 1.
+    max_pending -- Number of extracted meshes allowed to wait for a writer. Bounds memory use.
+    on_progress -- Called with the number of extracted parts after each one.
+    is_cancelled -- Checked before each part, returning True stops the export.
+
+    :returns:
+        The number of jobs written. Jobs are written in order, so on cancellation these are
+        the first jobs in the list.
+    """
+    written = 0
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, (part, target) in enumerate(jobs):
+            if is_cancelled is not None and is_cancelled():
+                break
+
+            mesh = extract_mesh(part)
+            pending.append(pool.submit(write_mesh, mesh, target))
+
+            # Wait on the oldest write before extracting more meshes than can be held
+            while len(pending) >= max_pending:
+                pending.popleft().result()
+                written += 1
+
+            if on_progress is not None:
+                on_progress(i + 1)
+
+        # Writes already queued are finished even when cancelled so no partial files are left
+        while pending:
+            pending.popleft().result()
+            written += 1
+
+    return written
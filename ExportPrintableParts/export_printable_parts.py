@@ -3,10 +3,261 @@ import adsk.fusion
 import traceback
 import os
 import time
+import csv
 from collections import defaultdict
+from .occurrence_index import build_occurrence_index
+from .design_walker import walk_parts
+from . import export_manifest
+from .export_pipeline import run_export_pipeline
+from .stl_writer import write_binary_stl, CM_TO_MM
+from .threemf_writer import ThreeMFWriter
+from .part_dedup import group_identical_parts, mesh_size
+from .plate_packing import pack_plates
+from . import filament_estimate
 
-def is_part(component):
-    return component.occurrences.count == 0
+# "stl" writes one file per part, "3mf" one archive per material holding every part
+OUTPUT_FORMAT = "stl"
+
+# Reuse the STLs of parts that have not changed since the last export into the same folder
+INCREMENTAL_EXPORT = True
+MESH_QUALITY = adsk.fusion.TriangleMeshQualityOptions.HighQualityTriangleMesh
+# Parts can override the mesh quality with a "meshQuality" attribute in this group
+# holding one of the names below, e.g. to export small detailed parts finer
+ATTRIBUTE_GROUP = "ExportPrintableParts"
+MESH_QUALITY_BY_NAME = {
+    "low": adsk.fusion.TriangleMeshQualityOptions.LowQualityTriangleMesh,
+    "normal": adsk.fusion.TriangleMeshQualityOptions.NormalQualityTriangleMesh,
+    "high": adsk.fusion.TriangleMeshQualityOptions.HighQualityTriangleMesh,
+    "veryhigh": adsk.fusion.TriangleMeshQualityOptions.VeryHighQualityTriangleMesh,
+}
+# Export parts with identical geometry once, with their quantities summed
+DEDUPLICATE = True
+# Also arrange every instance of the printable parts onto build plates, one 3MF per plate
+PACK_PLATES = False
+# Usable build plate size and the gap kept between parts, in millimeters
+PLATE_SIZE = (220.0, 220.0)
+PLATE_SPACING = 2.0
+# Axis of the design pointing up on the printer
+PRINT_AXIS = "z"
+# Rows of the 3MF rotation bringing each print axis up
+PRINT_ROTATIONS = {
+    "x": ((0, 0, 1), (0, 1, 0), (-1, 0, 0)),
+    "y": ((1, 0, 0), (0, 0, 1), (0, -1, 0)),
+    "z": ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+}
+# Write filament.csv with the filament volume, grams and cost needed per material
+ESTIMATE_FILAMENT = True
+# Filament cost per kilogram by material name, "default" is used for materials not listed
+FILAMENT_COST_PER_KG = {"default": 20.0}
+# Gzip the exported STLs
+COMPRESS_STL = False
+# Threads writing STLs while the next part is tessellated
+WRITER_THREADS = 4
+# Mesh values (coordinates, normals and indices) tessellated while deduplicating that are kept
+# for the export, about 32 MB. Bounds memory use, parts past it are tessellated again
+REUSED_MESH_BUDGET = 1_000_000
+
+def part_mesh_quality(part: adsk.fusion.Component):
+    attribute = part.attributes.itemByName(ATTRIBUTE_GROUP, "meshQuality")
+    if attribute is None:
+        return MESH_QUALITY
+    return MESH_QUALITY_BY_NAME.get(attribute.value.lower(), MESH_QUALITY)
+
+def extract_part_mesh(part: adsk.fusion.Component):
+    quality = part_mesh_quality(part)
+    meshes = list()
+    for body in part.bRepBodies:
+        calculator = body.meshManager.createMeshCalculator()
+        calculator.setQuality(quality)
+        mesh = calculator.calculate()
+        meshes.append((mesh.nodeCoordinatesAsFloat, mesh.normalVectorsAsFloat, mesh.nodeIndices))
+    return meshes
+
+def write_part_mesh(meshes, filename: str):
+    write_binary_stl(filename, meshes, compress=COMPRESS_STL)
+
+def create_progress(ui: adsk.core.UserInterface, total: int) -> adsk.core.ProgressDialog:
+    progress = ui.createProgressDialog()
+    progress.isCancelButtonShown = True
+    progress.show("Export Printable Parts", "Exporting part %v of %m", 0, total)
+    return progress
+
+def export_with_progress(progress: adsk.core.ProgressDialog, jobs: list, write_mesh, workers: int, exported_before: int = 0, meshes: dict = None) -> int:
+    def extract_mesh(part):
+        # Parts tessellated while deduplicating are not tessellated again
+        if meshes is not None and part.id in meshes:
+            return meshes.pop(part.id)
+        return extract_part_mesh(part)
+
+    def update_progress(exported):
+        progress.progressValue = exported_before + exported
+        # Let Fusion repaint the dialog and register clicks on cancel
+        adsk.doEvents()
+
+    return run_export_pipeline(
+        jobs,
+        extract_mesh,
+        write_mesh,
+        workers=workers,
+        on_progress=update_progress,
+        is_cancelled=lambda: progress.wasCancelled
+    )
+
+def export_stl(ui: adsk.core.UserInterface, export_folder: str, folder_path: str, parts_by_material: dict, quantities: dict, meshes: dict = None) -> bool:
+    previous_manifest = dict()
+    if INCREMENTAL_EXPORT:
+        previous_manifest = export_manifest.load_manifest(export_folder)
+    manifest = dict()
+
+    extension = ".stl.gz" if COMPRESS_STL else ".stl"
+    jobs = list()
+    for material in parts_by_material:
+        material_folder = folder_path + "/" + material
+        os.makedirs(material_folder)
+        for part in parts_by_material[material]:
+            part_filename = f"{material_folder}/{part.name}_{part.id}_{quantities[part.id]}{extension}"
+            fingerprint = export_manifest.part_fingerprint(part, part_mesh_quality(part), COMPRESS_STL)
+            if export_manifest.reuse_previous_export(previous_manifest, part.id, fingerprint, part_filename):
+                manifest[part.id] = {"fingerprint": fingerprint, "path": part_filename}
+                if meshes is not None:
+                    meshes.pop(part.id, None)
+            else:
+                jobs.append((part, part_filename, fingerprint))
+
+    progress = create_progress(ui, len(jobs))
+    try:
+        written = export_with_progress(progress, [(part, part_filename) for part, part_filename, _ in jobs], write_part_mesh, WRITER_THREADS, meshes=meshes)
+    finally:
+        progress.hide()
+
+    for part, part_filename, fingerprint in jobs[:written]:
+        manifest[part.id] = {"fingerprint": fingerprint, "path": part_filename}
+    export_manifest.save_manifest(export_folder, manifest)
+
+    return written == len(jobs)
+
+def export_3mf(ui: adsk.core.UserInterface, folder_path: str, parts_by_material: dict, quantities: dict, meshes: dict = None) -> bool:
+    total = sum(len(parts) for parts in parts_by_material.values())
+    progress = create_progress(ui, total)
+    exported = 0
+    try:
+        for material in parts_by_material:
+            parts = parts_by_material[material]
+            with ThreeMFWriter(f"{folder_path}/{material}.3mf") as writer:
+                def write_object(meshes, target):
+                    name, quantity = target
+                    writer.add_object(name, meshes, quantity)
+
+                # A design that is a single part has no occurrences but still prints once
+                jobs = [(part, (part.name, max(quantities[part.id], 1))) for part in parts]
+                # A single writer keeps the objects in order in the one model stream
+                written = export_with_progress(progress, jobs, write_object, 1, exported, meshes)
+
+            exported += written
+            if written < len(jobs):
+                break
+    finally:
+        progress.hide()
+
+    return exported == total
+
+def rotated_bounds(part: adsk.fusion.Component, rotation: tuple):
+    """Bounding box corners in millimeters of a part turned to its print orientation."""
+    box = part.boundingBox
+    low = (box.minPoint.x * CM_TO_MM, box.minPoint.y * CM_TO_MM, box.minPoint.z * CM_TO_MM)
+    high = (box.maxPoint.x * CM_TO_MM, box.maxPoint.y * CM_TO_MM, box.maxPoint.z * CM_TO_MM)
+    rotated_low = [sum(min(low[i] * row[j], high[i] * row[j]) for i, row in enumerate(rotation)) for j in range(3)]
+    rotated_high = [sum(max(low[i] * row[j], high[i] * row[j]) for i, row in enumerate(rotation)) for j in range(3)]
+    return rotated_low, rotated_high
+
+def export_plates(ui: adsk.core.UserInterface, folder_path: str, parts_by_material: dict, quantities: dict) -> bool:
+    rotation = PRINT_ROTATIONS[PRINT_AXIS]
+    rotation_values = tuple(value for row in rotation for value in row)
+    plate_folder = folder_path + "/plates"
+    os.makedirs(plate_folder)
+
+    total = sum(len(parts) for parts in parts_by_material.values())
+    progress = create_progress(ui, total)
+    try:
+        exported = 0
+        too_large = list()
+        for material in parts_by_material:
+            parts = parts_by_material[material]
+            bounds = {part.id: rotated_bounds(part, rotation) for part in parts}
+            rectangles = list()
+            for part in parts:
+                low, high = bounds[part.id]
+                rectangles.extend([(part.id, high[0] - low[0], high[1] - low[1])] * max(quantities[part.id], 1))
+
+            plates, unplaced = pack_plates(rectangles, PLATE_SIZE[0], PLATE_SIZE[1], PLATE_SPACING)
+            unplaced = set(unplaced)
+            too_large.extend(part.name for part in parts if part.id in unplaced)
+
+            placements = defaultdict(list)
+            for plate_index, plate in enumerate(plates):
+                for placement in plate.placements:
+                    placements[placement.key].append((plate_index, placement))
+
+            # Every plate of the material is written at once so each part is only tessellated once
+            writers = [ThreeMFWriter(f"{plate_folder}/{material}_plate{plate_index + 1}.3mf") for plate_index in range(len(plates))]
+            try:
+                def write_object(meshes, target):
+                    part_id, name = target
+                    low, _ = bounds[part_id]
+                    object_ids = dict()
+                    for plate_index, placement in placements[part_id]:
+                        writer = writers[plate_index]
+                        if plate_index not in object_ids:
+                            object_ids[plate_index] = writer.add_object(name, meshes, 0)
+                        translation = (placement.x - low[0], placement.y - low[1], -low[2])
+                        writer.add_item(object_ids[plate_index], rotation_values + translation)
+
+                # Name and id are read here since the writer thread must not touch the API
+                jobs = [(part, (part.id, part.name)) for part in parts if part.id in placements]
+                written = export_with_progress(progress, jobs, write_object, 1, exported)
+            finally:
+                for writer in writers:
+                    writer.close()
+
+            exported += len(parts)
+            if written < len(jobs):
+                return False
+    finally:
+        progress.hide()
+
+    if len(too_large) > 0:
+        ui.messageBox("The following parts do not fit on a plate:\n\t{}".format("\n\t".join(too_large)))
+
+    return True
+
+def deduplicate_parts(folder_path: str, parts_by_material: dict, occurrence_index, cache: filament_estimate.PropertyCache):
+    """Reduces every material to one part per distinct shape.
+
+    Writes quantities.csv listing the components each exported part stands in for.
+
+    :returns:
+        The reduced parts by material, the summed quantity of each remaining part by id and
+        the meshes already extracted for remaining parts by id, up to REUSED_MESH_BUDGET.
+    """
+    unique_parts = dict()
+    quantities = dict()
+    meshes = dict()
+    budget = REUSED_MESH_BUDGET
+    with open(folder_path + "/quantities.csv", "w", newline="") as quantities_file:
+        writer = csv.writer(quantities_file)
+        writer.writerow(["material", "part", "quantity", "components"])
+        for material in parts_by_material:
+            unique_parts[material] = list()
+            groups, group_meshes = group_identical_parts(parts_by_material[material], extract_part_mesh, cache, part_mesh_quality, budget)
+            budget -= sum(mesh_size(part_meshes) for part_meshes in group_meshes.values())
+            meshes.update(group_meshes)
+            for group in groups:
+                part = group[0]
+                quantities[part.id] = sum(occurrence_index.count(duplicate) for duplicate in group)
+                unique_parts[material].append(part)
+                writer.writerow([material, part.name, quantities[part.id], ";".join(duplicate.name for duplicate in group)])
+
+    return unique_parts, quantities, meshes
 
 def save_parts(folder, parts_by_material):
     folder_path = folder + f"/export_{time.time()}"
@@ -33,28 +284,45 @@ def run(context):
         folderDialog.title = "Export Directory"
         result = folderDialog.showDialog()
         if result == adsk.core.DialogResults.DialogOK:
-            # Get all components in the design
-            components = design.allComponents
+            # Only the printable parts are kept, everything else is dropped as it is walked
+            printable_parts = defaultdict(list)
+            for part, material_name, _ in walk_parts(design):
+                if "plastic" in material_name.lower():
+                    printable_parts[material_name].append(part)
+
+            # Count every component's occurrences up front instead of scanning the
+            # whole assembly once per exported part
+            occurrence_index = build_occurrence_index(root_comp)
 
-            parts_by_material = defaultdict(list)
-            for component in components:
-                if is_part(component):
-                    material = component.material
-                    parts_by_material[material.name].append(component)
+            # Physical properties are slow to compute, unchanged parts are read from the cache
+            cache = filament_estimate.PropertyCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), filament_estimate.CACHE_NAME))
 
-            export_mgr = design.exportManager
             folder_path = folderDialog.folder + f"/export_{time.time()}"
             os.makedirs(folder_path)
-            for material in parts_by_material:
-                if "plastic" in material.lower():
-                    material_folder = folder_path + "/" + material
-                    os.makedirs(material_folder)
-                    for part in parts_by_material[material]:
-                        part_filename = f"{material_folder}/{part.name}_{part.id}_{root_comp.allOccurrencesByComponent(part).count}.stl"
-                        export_opts = export_mgr.createSTLExportOptions(part, part_filename)
-                        export_opts.meshRefinement = 0
-                        export_mgr.execute(export_opts)
+            meshes = dict()
+            if DEDUPLICATE:
+                printable_parts, quantities, meshes = deduplicate_parts(folder_path, printable_parts, occurrence_index, cache)
+                cache.save()
+            else:
+                quantities = {part.id: occurrence_index.count(part) for parts in printable_parts.values() for part in parts}
+
+            if OUTPUT_FORMAT == "3mf":
+                completed = export_3mf(ui, folder_path, printable_parts, quantities, meshes)
+            else:
+                completed = export_stl(ui, folderDialog.folder, folder_path, printable_parts, quantities, meshes)
+            meshes.clear()
+
+            if completed and PACK_PLATES:
+                completed = export_plates(ui, folder_path, printable_parts, quantities)
+
+            if not completed:
+                ui.messageBox("Export cancelled")
+                return
 
+            if ESTIMATE_FILAMENT:
+                estimate = filament_estimate.estimate_filament(printable_parts, quantities, FILAMENT_COST_PER_KG, cache)
+                cache.save()
+                filament_estimate.save_estimate(folder_path + "/filament.csv", estimate)
 
             ui.messageBox("Done exporting")
         else:
@@ -0,0 +1,113 @@
+import adsk.core
+import adsk.fusion
+import csv
+import json
+import os
+from collections import OrderedDict
+
+from .export_manifest import geometry_fingerprint
+
+CACHE_NAME = "physical_properties_cache.json"
+# Parts kept in the cache, the least recently used are dropped first
+CACHE_SIZE = 10000
+
+
+class PropertyCache:
+    """Persistent LRU cache of part physical properties.
+
+    Entries are keyed by component id and only used while the part's fingerprint matches,
+    so an edited part is simply computed again.
+    """
+
+    def __init__(self, filename: str, max_entries: int = CACHE_SIZE):
+        self.filename = filename
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+        try:
+            with open(filename) as cache_file:
+                self._entries = OrderedDict(json.load(cache_file))
+        except (OSError, ValueError):
+            # A missing or broken cache only costs recomputing the properties
+            pass
+
+    def get(self, part_id: str, fingerprint: str):
+        entry = self._entries.get(part_id)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+
+        self._entries.move_to_end(part_id)
+        return entry["properties"]
+
+    def put(self, part_id: str, fingerprint: str, properties: dict):
+        self._entries[part_id] = {"fingerprint": fingerprint, "properties": properties}
+        self._entries.move_to_end(part_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w") as cache_file:
+            json.dump(list(self._entries.items()), cache_file)
+        os.replace(temp_filename, self.filename)
+
+
+def part_properties(part: adsk.fusion.Component, cache: PropertyCache, geometry: list = None) -> dict:
+    """Volume in cm^3 and mass in grams of a single part.
+
+    The returned dict is the cached entry itself, values added to it are kept for as long
+    as the part does not change.
+
+    Arguments:
+    part -- The part.
+    cache -- Cache the properties are read from and added to.
+    geometry -- The part's geometry_fingerprint when the caller already has it.
+    """
+    if geometry is None:
+        geometry = geometry_fingerprint(part)
+    fingerprint = json.dumps(geometry + [part.material.name])
+    properties = cache.get(part.id, fingerprint)
+    if properties is None:
+        physical_properties = part.getPhysicalProperties(adsk.fusion.CalculationAccuracy.HighCalculationAccuracy)
+        properties = {
+            "volume": physical_properties.volume,
+            # Fusion reports mass in kilograms from the density of the assigned material
+            "grams": physical_properties.mass * 1000.0,
+        }
+        cache.put(part.id, fingerprint, properties)
+    return properties
+
+
+def estimate_filament(parts_by_material: dict, quantities: dict, cost_per_kg: dict, cache: PropertyCache) -> list:
+    """Bill of filament per material, every part multiplied by its quantity.
+
+    Parts are treated as solid, so the estimate is an upper bound for infilled prints.
+    """
+    rows = list()
+    for material in parts_by_material:
+        instances = 0
+        volume = 0.0
+        grams = 0.0
+        for part in parts_by_material[material]:
+            # A design that is a single part has no occurrences but still prints once
+            quantity = max(quantities[part.id], 1)
+            properties = part_properties(part, cache)
+            instances += quantity
+            volume += properties["volume"] * quantity
+            grams += properties["grams"] * quantity
+
+        rows.append({
+            "material": material,
+            "instances": instances,
+            "volume_cm3": round(volume, 2),
+            "grams": round(grams, 1),
+            "cost": round(grams / 1000.0 * cost_per_kg.get(material, cost_per_kg.get("default", 0.0)), 2),
+        })
+    return rows
+
+
+def save_estimate(filename: str, rows: list):
+    with open(filename, "w", newline="") as estimate_file:
+        writer = csv.DictWriter(estimate_file, fieldnames=["material", "instances", "volume_cm3", "grams", "cost"])
+        writer.writeheader()
+        writer.writerows(rows)
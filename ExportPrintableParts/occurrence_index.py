@@ -0,0 +1,44 @@
+# Fusion loads every script folder on its own, so CheckMaterials and ExportPrintableParts
+# each carry a copy of this module. Keep the two in sync.
+import adsk.core
+import adsk.fusion
+from collections import defaultdict
+
+
+class OccurrenceIndex:
+    """Quantity and occurrence paths of every component, gathered in one walk of the assembly.
+
+    Components are keyed by their id since API proxies for the same component are not
+    guaranteed to hash or compare the same.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.paths = defaultdict(list)
+
+    def count(self, component: adsk.fusion.Component) -> int:
+        return self.counts.get(component.id, 0)
+
+    def occurrence_paths(self, component: adsk.fusion.Component) -> list:
+        return self.paths.get(component.id, [])
+
+
+def build_occurrence_index(root_comp: adsk.fusion.Component) -> OccurrenceIndex:
+    index = OccurrenceIndex()
+
+    # Walk the occurrence tree top down, carrying the path of the parent so each
+    # occurrence is only visited once no matter how deep the assembly is.
+    stack = [(root_comp.occurrences, "")]
+    while stack:
+        occurrences, parent_path = stack.pop()
+        for occurrence in occurrences:
+            path = f"{parent_path}/{occurrence.name}" if parent_path else occurrence.name
+            component_id = occurrence.component.id
+            index.counts[component_id] += 1
+            index.paths[component_id].append(path)
+
+            child_occurrences = occurrence.childOccurrences
+            if child_occurrences.count > 0:
+                stack.append((child_occurrences, path))
+
+    return index
@@ -0,0 +1,97 @@
+import adsk.core
+import adsk.fusion
+import hashlib
+from array import array
+from collections import defaultdict
+from typing import Callable
+
+from .export_manifest import geometry_fingerprint
+from .filament_estimate import PropertyCache, part_properties
+
+# Vertices closer than this (in cm) hash the same
+VERTEX_TOLERANCE = 1e-4
+
+
+def shape_key(geometry: list, properties: dict) -> tuple:
+    """Cheap key that differs for most non identical parts, used to avoid tessellating parts
+    that can not have a duplicate.
+
+    Arguments:
+    geometry -- The part's geometry_fingerprint.
+    properties -- The part's cached physical properties.
+    """
+    _, body_count, face_count, low, high = geometry
+    return (
+        body_count,
+        face_count,
+        round(properties["volume"], 4),
+        round(high[0] - low[0], 4),
+        round(high[1] - low[1], 4),
+        round(high[2] - low[2], 4),
+    )
+
+
+def mesh_hash(meshes) -> str:
+    """Hash of the quantized vertices and triangles of a part's meshes."""
+    digest = hashlib.sha1()
+    scale = 1.0 / VERTEX_TOLERANCE
+    for coordinates, _, indices in meshes:
+        digest.update(array("q", map(round, map(scale.__mul__, coordinates))).tobytes())
+        digest.update(array("q", indices).tobytes())
+    return digest.hexdigest()
+
+
+def mesh_size(meshes) -> int:
+    """Number of coordinate, normal and index values in a part's meshes."""
+    return sum(len(coordinates) + len(normals) + len(indices) for coordinates, normals, indices in meshes)
+
+
+def group_identical_parts(parts: list, extract_mesh: Callable, cache: PropertyCache, mesh_quality: Callable, mesh_budget: int = 0) -> tuple:
+    """Groups parts with the same geometry.
+
+    Parts are first bucketed by shape_key, only parts sharing a bucket are compared by
+    mesh_hash. Both come from the property cache, so unchanged parts are neither measured
+    nor tessellated again on later runs.
+
+    Arguments:
+    parts -- The parts to group.
+    extract_mesh -- Called with a part, returns its meshes.
+    cache -- Cache of the parts' physical properties, the mesh hashes are kept with them.
+    mesh_quality -- Called with a part, returns the mesh quality it is exported at.
+    mesh_budget -- Mesh values, see mesh_size, of the extracted meshes that may be kept for the
+                   export. Meshes past it are dropped once hashed and tessellated again later.
+
+    :returns:
+        A list of groups, each a list of parts with identical geometry, the first part of each
+        group standing in for the rest. And the meshes kept for those first parts by id, so
+        they do not have to be tessellated again for the export.
+    """
+    buckets = defaultdict(list)
+    for part in parts:
+        geometry = geometry_fingerprint(part)
+        properties = part_properties(part, cache, geometry)
+        buckets[shape_key(geometry, properties)].append((part, properties))
+
+    groups = list()
+    meshes = dict()
+    for bucket in buckets.values():
+        if len(bucket) == 1:
+            groups.append([bucket[0][0]])
+            continue
+
+        by_hash = defaultdict(list)
+        for part, properties in bucket:
+            hash_key = f"mesh_hash_{mesh_quality(part)}"
+            if hash_key not in properties:
+                part_meshes = extract_mesh(part)
+                properties[hash_key] = mesh_hash(part_meshes)
+                # Only the first part of a group is exported, and only while the budget lasts
+                size = mesh_size(part_meshes)
+                if properties[hash_key] not in by_hash and size <= mesh_budget:
+                    meshes[part.id] = part_meshes
+                    mesh_budget -= size
+            by_hash[properties[hash_key]].append(part)
+
+        groups.extend(by_hash.values())
+
+    return groups, meshes
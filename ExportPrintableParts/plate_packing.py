@@ -0,0 +1,123 @@
+class Placement:
+    def __init__(self, key, x: float, y: float, width: float, depth: float):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.width = width
+        self.depth = depth
+
+
+class SkylinePlate:
+    """Bottom left skyline packing of rectangles onto one plate.
+
+    The skyline is the list of (x, y, width) segments forming the upper edge of everything
+    placed so far. A rectangle is placed on the segment where its bottom edge ends up lowest.
+    """
+
+    def __init__(self, width: float, depth: float):
+        self.width = width
+        self.depth = depth
+        self.placements = list()
+        self._skyline = [(0.0, 0.0, width)]
+
+    def _fit(self, index: int, width: float, depth: float):
+        # Height the rectangle would rest at when its left edge is at segment index
+        x = self._skyline[index][0]
+        if x + width > self.width:
+            return None
+
+        y = 0.0
+        remaining = width
+        while remaining > 1e-9 and index < len(self._skyline):
+            _, segment_y, segment_width = self._skyline[index]
+            y = max(y, segment_y)
+            if y + depth > self.depth:
+                return None
+            remaining -= segment_width
+            index += 1
+        return y
+
+    def insert(self, key, width: float, depth: float) -> bool:
+        best_index = None
+        best_y = None
+        for index in range(len(self._skyline)):
+            y = self._fit(index, width, depth)
+            if y is not None and (best_y is None or y < best_y):
+                best_index = index
+                best_y = y
+
+        if best_index is None:
+            return False
+
+        x = self._skyline[best_index][0]
+        self.placements.append(Placement(key, x, best_y, width, depth))
+        self._raise_skyline(best_index, x, best_y + depth, width)
+        return True
+
+    def _raise_skyline(self, index: int, x: float, y: float, width: float):
+        skyline = self._skyline
+        skyline.insert(index, (x, y, width))
+
+        # Trim or drop the segments now covered by the new one
+        right = x + width
+        i = index + 1
+        while i < len(skyline):
+            segment_x, segment_y, segment_width = skyline[i]
+            if segment_x >= right:
+                break
+            segment_right = segment_x + segment_width
+            if segment_right <= right:
+                del skyline[i]
+            else:
+                skyline[i] = (right, segment_y, segment_right - right)
+                break
+
+        # Merge neighbours of equal height to keep the skyline short
+        merged = [skyline[0]]
+        for segment in skyline[1:]:
+            last = merged[-1]
+            if last[1] == segment[1]:
+                merged[-1] = (last[0], last[1], last[2] + segment[2])
+            else:
+                merged.append(segment)
+        self._skyline = merged
+
+
+def pack_plates(rectangles: list, plate_width: float, plate_depth: float, spacing: float = 0.0):
+    """Packs rectangles onto as many plates as needed.
+
+    Arguments:
+    rectangles -- List of (key, width, depth), one entry per instance to place.
+    plate_width -- Usable width of a plate.
+    plate_depth -- Usable depth of a plate.
+    spacing -- Gap kept between placed rectangles.
+
+    :returns:
+        The list of filled plates and the list of keys too large for an empty plate.
+    """
+    plates = list()
+    too_large = list()
+
+    # Tallest first keeps the skyline flat, which is what bottom left placement needs
+    ordered = sorted(rectangles, key=lambda rectangle: (rectangle[2], rectangle[1]), reverse=True)
+    plate = None
+    for key, width, depth in ordered:
+        if width > plate_width or depth > plate_depth:
+            too_large.append(key)
+            continue
+
+        # Room is left for the spacing on the far side of every rectangle
+        padded_width = min(width + spacing, plate_width)
+        padded_depth = min(depth + spacing, plate_depth)
+        if plate is None or not plate.insert(key, padded_width, padded_depth):
+            plate = SkylinePlate(plate_width, plate_depth)
+            plates.append(plate)
+            plate.insert(key, padded_width, padded_depth)
+
+    # Report the real size of what was placed rather than the padded one
+    sizes = {key: (width, depth) for key, width, depth in rectangles}
+    for plate in plates:
+        for placement in plate.placements:
+            placement.width, placement.depth = sizes[placement.key]
+
+    return plates, too_large
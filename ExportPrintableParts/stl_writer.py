@@ -0,0 +1,87 @@
+import gzip
+import struct
+import sys
+from array import array
+
+# Fusion works in centimeters, slicers expect STL files in millimeters
+CM_TO_MM = 10.0
+
+_HEADER = b"Binary STL written by ExportPrintableParts".ljust(80, b" ")
+# Normal, three vertices and the attribute byte count
+_RECORD_SIZE = 50
+_RECORD_WORDS = _RECORD_SIZE // 2
+_FLOAT_WORDS = 2
+
+
+def triangle_count(meshes) -> int:
+    return sum(len(indices) // 3 for _, _, indices in meshes)
+
+
+def _gather(values: list, indices) -> array:
+    # map() runs the lookups in C, only the resulting floats are ever touched
+    return array("f", map(values.__getitem__, indices))
+
+
+def _mesh_columns(coordinates, normals, indices, scale: float) -> list:
+    """Returns the twelve float columns of a binary STL record, one value per triangle."""
+    # Plain lists hand out their existing float objects on lookup where an array would box a new one
+    axes = [list(map(scale.__mul__, coordinates[axis::3])) for axis in range(3)]
+    normal_axes = [list(normals[axis::3]) for axis in range(3)]
+
+    corners = [indices[corner::3] for corner in range(3)]
+
+    # Fusion reports normals per node, the one of the first corner stands in for the facet
+    columns = [_gather(normal_axes[axis], corners[0]) for axis in range(3)]
+    for corner in corners:
+        columns.extend(_gather(axes[axis], corner) for axis in range(3))
+
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+
+    return columns
+
+
+def mesh_records(coordinates, normals, indices, scale: float = CM_TO_MM) -> bytearray:
+    """Packs a triangle mesh into binary STL facet records.
+
+    Every column is copied into the record buffer with strided memoryview assignments, so
+    no Python object is created per triangle.
+    """
+    count = len(indices) // 3
+    records = bytearray(count * _RECORD_SIZE)
+    if count == 0:
+        return records
+
+    # A record is 25 two byte words, so both the buffer and every float column can be viewed
+    # as words and each half of a float copied with a single strided assignment
+    view = memoryview(records).cast("H")
+    for column_index, column in enumerate(_mesh_columns(coordinates, normals, indices[:count * 3], scale)):
+        column_words = memoryview(column).cast("B").cast("H")
+        offset = column_index * _FLOAT_WORDS
+        for word in range(_FLOAT_WORDS):
+            view[offset + word::_RECORD_WORDS] = column_words[word::_FLOAT_WORDS]
+
+    # The trailing attribute byte counts are left zero
+    return records
+
+
+def write_binary_stl(filename: str, meshes, scale: float = CM_TO_MM, compress: bool = False):
+    """Writes one binary STL holding every mesh.
+
+    Arguments:
+    filename -- Path of the STL file.
+    meshes -- List of (coordinates, normals, indices) where coordinates and normals are flat
+              x, y, z lists per node and indices a flat list of three node indices per
+              triangle, as returned by TriangleMesh.nodeCoordinatesAsFloat,
+              TriangleMesh.normalVectorsAsFloat and TriangleMesh.nodeIndices.
+    scale -- Factor applied to every coordinate.
+    compress -- Gzip the file.
+    """
+    opener = gzip.open if compress else open
+    with opener(filename, "wb") as stl_file:
+        stl_file.write(_HEADER)
+        stl_file.write(struct.pack("<I", triangle_count(meshes)))
+        for coordinates, normals, indices in meshes:
+            stl_file.write(mesh_records(coordinates, normals, indices, scale))
+
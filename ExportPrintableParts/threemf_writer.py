@@ -0,0 +1,119 @@
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+from .stl_writer import CM_TO_MM
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+
+_RELATIONSHIPS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+
+_MODEL_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">
+<resources>
+"""
+
+# Vertices and triangles are formatted and written this many at a time
+_CHUNK_SIZE = 4096
+
+
+class ThreeMFWriter:
+    """Streams objects into a 3MF archive.
+
+    Each object's mesh is written to the zip as soon as it is added, only the build items are
+    kept until the build section is written on close, so memory use does not grow with the
+    size of the meshes already written. Quantities are written as
+    build items referencing the same object rather than copies of the mesh.
+    """
+
+    def __init__(self, filename: str, scale: float = CM_TO_MM):
+        self._scale = scale
+        self._archive = zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED)
+        self._archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._archive.writestr("_rels/.rels", _RELATIONSHIPS)
+        self._model = self._archive.open("3D/3dmodel.model", "w", force_zip64=True)
+        self._write(_MODEL_HEADER)
+        self._items = list()
+        self._next_id = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def _write(self, text: str):
+        self._model.write(text.encode("utf-8"))
+
+    def add_object(self, name: str, meshes, quantity: int = 1) -> int:
+        """Writes one object built from every mesh and adds quantity instances of it.
+
+        Arguments:
+        name -- Name of the object shown by the slicer.
+        meshes -- List of (coordinates, normals, indices) as written by stl_writer.
+        quantity -- Number of build items referencing the object.
+
+        :returns:
+            The id of the object, which can be passed to add_instances.
+        """
+        object_id = self._next_id
+        self._next_id += 1
+
+        self._write(f'<object id="{object_id}" type="model" name={quoteattr(name)}>\n<mesh>\n<vertices>\n')
+        scale = self._scale
+        for coordinates, _, _ in meshes:
+            for start in range(0, len(coordinates), _CHUNK_SIZE * 3):
+                chunk = coordinates[start:start + _CHUNK_SIZE * 3]
+                self._write("".join(
+                    f'<vertex x="{x * scale:.4f}" y="{y * scale:.4f}" z="{z * scale:.4f}"/>\n'
+                    for x, y, z in zip(chunk[0::3], chunk[1::3], chunk[2::3])
+                ))
+
+        self._write('</vertices>\n<triangles>\n')
+        # Bodies share the vertex list, so each body's indices start after the previous body's nodes
+        node_offset = 0
+        for coordinates, _, indices in meshes:
+            for start in range(0, len(indices) - 2, _CHUNK_SIZE * 3):
+                chunk = indices[start:start + _CHUNK_SIZE * 3]
+                self._write("".join(
+                    f'<triangle v1="{a + node_offset}" v2="{b + node_offset}" v3="{c + node_offset}"/>\n'
+                    for a, b, c in zip(chunk[0::3], chunk[1::3], chunk[2::3])
+                ))
+            node_offset += len(coordinates) // 3
+
+        self._write('</triangles>\n</mesh>\n</object>\n')
+        self.add_instances(object_id, quantity)
+        return object_id
+
+    def add_instances(self, object_id: int, quantity: int):
+        self._items.extend([(object_id, None)] * quantity)
+
+    def add_item(self, object_id: int, transform: tuple):
+        """Adds one instance of an object placed by a 3MF transform, the twelve values of
+        its rotation rows followed by the translation in millimeters.
+        """
+        self._items.append((object_id, " ".join(f"{value:.4f}" for value in transform)))
+
+    def close(self):
+        if self._archive is None:
+            return
+
+        self._write('</resources>\n<build>\n')
+        for object_id, transform in self._items:
+            if transform is None:
+                self._write(f'<item objectid="{object_id}"/>\n')
+            else:
+                self._write(f'<item objectid="{object_id}" transform="{transform}"/>\n')
+        self._write('</build>\n</model>\n')
+
+        self._model.close()
+        self._archive.close()
+        self._archive = None
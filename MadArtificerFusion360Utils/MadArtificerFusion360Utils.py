@@ -1,6 +1,7 @@
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
 from . import commands
 from .lib import fusionAddInUtils as futil
+from .lib import designIndex
 
 
 def run(context):
@@ -8,17 +9,28 @@ def run(context):
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.start()
 
+        # Keep the design index of the open documents up to date
+        designIndex.start()
+
     except:
         futil.handle_error('run')
 
 
 def stop(context):
     try:
+        # This will run the stop function in each of your commands as defined in commands/__init__.py
+        commands.stop()
+
+        designIndex.stop()
+
+        # Write out buffered log messages while the handler flushing them still exists
+        futil.close_log()
+
         # Remove all of the event handlers your app has created
         futil.clear_handlers()
 
-        # This will run the start function in each of your commands as defined in commands/__init__.py
-        commands.stop()
+        # Cached faces belong to this session's documents
+        futil.clear_topology_cache()
 
     except:
         futil.handle_error('stop')
\ No newline at end of file
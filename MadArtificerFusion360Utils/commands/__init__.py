@@ -5,12 +5,16 @@
 # You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry".
 from .teardropCreator import entry as teardropCreator
 from .unsupportedHole import entry as unsupportedHole
+from .checkMaterials import entry as checkMaterials
+from .materialValidator import entry as materialValidator
 
 # TODO add your imported modules to this list.
 # Fusion will automatically call the start() and stop() functions.
 commands = [
     teardropCreator,
-    unsupportedHole
+    unsupportedHole,
+    checkMaterials,
+    materialValidator
 ]
 
 
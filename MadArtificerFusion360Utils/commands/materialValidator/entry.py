@@ -0,0 +1,210 @@
+import adsk.core
+import json
+import os
+
+import adsk.fusion
+from ...lib import fusionAddInUtils as futil
+from ...lib import designIndex
+from ... import config
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+
+# TODO *** Specify the command identity information. ***
+CMD_ID = f'{config.ADDIN_NAME}_materialValidator'
+CMD_NAME = 'Material Validator'
+CMD_Description = 'Show the live count of parts that have not been assigned a material'
+
+# Specify that the command will be promoted to the panel.
+IS_PROMOTED = False
+
+# TODO *** Define the location where the command button will be created. ***
+# This is done by specifying the workspace, the tab, and the panel, and the 
+# command it will be inserted beside. Not providing the command to position it
+# will insert it at the end.
+WORKSPACE_ID = 'FusionSolidEnvironment'
+PANEL_ID = 'SolidScriptsAddinsPanel'
+COMMAND_BESIDE_ID = 'ScriptsManagerCommand'
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+PALETTE_ID = f'{config.ADDIN_NAME}_materialValidatorPalette'
+PALETTE_URL = os.path.join(ICON_FOLDER, 'html', 'index.html').replace('\\', '/')
+
+DEFAULT_MATERIAL = "Default"
+# Number of part names sent to the palette
+MAX_LISTED_PARTS = 50
+
+# Local list of event handlers used to maintain a reference so
+# they are not released and garbage collected.
+local_handlers = []
+
+# Per document creation id, the index and its revision last validated and the ids of the
+# parts found without a material. A reopened document gets a new index whose revisions start
+# over, so the revision alone does not tell whether the result is still current.
+_validated = {}
+
+# Validation runs once Fusion is idle instead of inside the event that reported the edit, and
+# bursts of edits only run a single pass
+_validation = futil.DeferredHandler(lambda args: validate_materials(), name='validateMaterials')
+
+# Executed when add-in is run.
+def start():
+    # Create a command Definition.
+    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+
+    # Define an event handler for the command created event. It will be called when the button is clicked.
+    futil.add_handler(cmd_def.commandCreated, command_created)
+
+    # ******** Add a button into the UI so the user can run the command. ********
+    # Get the target workspace the button will be created in.
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+
+    # Get the panel the button will be created in.
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+
+    # Create the button command control in the UI after the specified existing command.
+    control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
+
+    # Specify if the command is promoted to the main toolbar. 
+    control.isPromoted = IS_PROMOTED
+
+    # Validate in the background after every edit and when switching documents
+    futil.add_handler(ui.commandTerminated, command_terminated, name='materialValidatorCommandTerminated')
+    futil.add_handler(app.documentActivated, document_activated, name='materialValidatorDocumentActivated')
+    futil.add_handler(app.documentClosed, document_closed, name='materialValidatorDocumentClosed')
+
+
+# Executed when add-in is stopped.
+def stop():
+    # Get the various UI elements for this command
+    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+    panel = workspace.toolbarPanels.itemById(PANEL_ID)
+    command_control = panel.controls.itemById(CMD_ID)
+    command_definition = ui.commandDefinitions.itemById(CMD_ID)
+    palette = ui.palettes.itemById(PALETTE_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+    # Delete the palette
+    if palette:
+        palette.deleteMe()
+
+    _validation.cancel()
+    _validated.clear()
+
+
+# Function that is called when a user clicks the corresponding button in the UI.
+# This defines the contents of the command dialog and connects to the command related events.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # The command has no inputs, so execute is fired right away
+    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
+    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
+
+
+# This event handler is called when the user clicks the OK button in the command dialog or 
+# is immediately called after the created event not command inputs were created for the dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    palette = ui.palettes.itemById(PALETTE_ID)
+    if palette is None:
+        palette = ui.palettes.add(PALETTE_ID, CMD_NAME, PALETTE_URL, True, True, True, 300, 400)
+        palette.dockingState = adsk.core.PaletteDockingStates.PaletteDockStateRight
+        futil.add_handler(palette.incomingFromHTML, palette_incoming, name='materialValidatorPalette')
+    else:
+        palette.isVisible = True
+
+    schedule_validation()
+
+
+# This event handler is called when the command terminates.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    # General logging for debug.
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+    global local_handlers
+    local_handlers = []
+
+
+# The palette asks for the current state once its page has loaded.
+def palette_incoming(args: adsk.core.HTMLEventArgs):
+    if args.action == 'ready':
+        schedule_validation()
+
+
+def command_terminated(args: adsk.core.ApplicationCommandEventArgs):
+    if args.commandId == CMD_ID:
+        return
+    if args.terminationReason == adsk.core.CommandTerminationReason.CancelledTerminationReason:
+        return
+    if is_palette_visible():
+        schedule_validation()
+
+
+def document_activated(args: adsk.core.DocumentEventArgs):
+    if is_palette_visible():
+        schedule_validation()
+
+
+def document_closed(args: adsk.core.DocumentEventArgs):
+    # Drop the results of documents that are no longer open
+    for document_id in [document_id for document_id, (index, _, _) in _validated.items() if not index.design.isValid]:
+        del _validated[document_id]
+
+
+def is_palette_visible() -> bool:
+    # A hidden palette is brought up to date when it is shown again
+    palette = ui.palettes.itemById(PALETTE_ID)
+    return palette is not None and palette.isVisible
+
+
+def schedule_validation():
+    _validation.schedule(None)
+
+
+def validate_materials():
+    design = adsk.fusion.Design.cast(app.activeProduct)
+    if not design:
+        return
+
+    # The index only re-reads the components whose revision changed, and of those only the
+    # ones this validator has not seen yet are checked again
+    index = designIndex.get_design_index(design)
+    document_id = design.parentDocument.creationId
+    validated_index, validated_revision, missing = _validated.get(document_id, (None, 0, set()))
+    if validated_index is not index:
+        validated_revision = 0
+        missing = set()
+    if index.revision != validated_revision:
+        for component_id, entry in index.changed_since(validated_revision):
+            if entry.is_part and entry.material == DEFAULT_MATERIAL:
+                missing.add(component_id)
+            else:
+                missing.discard(component_id)
+        missing &= index.entries.keys()
+        _validated[document_id] = (index, index.revision, missing)
+
+    update_palette(index, missing)
+
+
+def update_palette(index: designIndex.DesignIndex, missing: set):
+    palette = ui.palettes.itemById(PALETTE_ID)
+    if palette is None or not palette.isVisible:
+        return
+
+    names = sorted(index.entries[component_id].name for component_id in missing)
+    state = {'count': len(missing), 'names': names[:MAX_LISTED_PARTS]}
+    palette.sendInfoToHTML('update', json.dumps(state))
@@ -1,9 +1,12 @@
 import adsk.core
+import math
 import os
 
 import adsk.fusion
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from . import teardrop_geometry
+from . import hole_scan
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -80,9 +83,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     # https://help.autodesk.com/view/fusion360/ENU/?contextId=CommandInputs
     inputs = args.command.commandInputs
 
+    # Find every hole perpendicular to the print axis instead of picking them
+    scan_input = inputs.addBoolValueInput('scanValue', 'Find holes automatically', True, '', False)
+
     # Where to start teardrop (sketch will be on the plane of this circular edge)
-    start_selection = inputs.addSelectionInput('edgeSelection', "Teardrop Start", "Select edge of hole")
-    start_selection.setSelectionLimits(1, 1)
+    start_selection = inputs.addSelectionInput('edgeSelection', "Teardrop Start", "Select edges of holes")
+    start_selection.setSelectionLimits(1, 0)
     start_selection.addSelectionFilter('CircularEdges')
 
     # Axis of print
@@ -97,6 +103,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
 
     flip_selection = inputs.addDirectionCommandInput('flipSelection', 'Flip')
 
+    # The teardrop is placed exactly either way, constraints only keep it attached on later edits
+    constrain_input = inputs.addBoolValueInput('constrainValue', 'Add constraints', True, '', False)
+
+    # Cut every teardrop with one base feature and combine per body instead of sketches and extrudes
+    lightweight_input = inputs.addBoolValueInput('lightweightValue', 'Lightweight output', True, '', False)
+
     # TODO Connect to the events that are needed by this command.
     futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
     futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
@@ -104,6 +116,9 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.add_handler(args.command.validateInputs, command_validate_input, local_handlers=local_handlers)
     futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
 
+    # The design does not change while the dialog is up, so validation need not check revisions
+    futil.begin_topology_session()
+
 
 # This event handler is called when the user clicks the OK button in the command dialog or 
 # is immediately called after the created event not command inputs were created for the dialog.
@@ -111,29 +126,45 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Execute Event')
 
+    # Creating the teardrops modifies the bodies the cached edges belong to
+    futil.end_topology_session()
+
     # TODO ******************************** Your code here ********************************
 
     # Get a reference to your command's inputs.
     inputs = args.command.commandInputs
     
-    edgeInput = inputs.itemById('edgeSelection')
-    circle = edgeInput.selection(0).entity
-
     axisInput = inputs.itemById('axisSelection')
     orientation_axis = axisInput.selection(0).entity
 
-    extentInput = inputs.itemById('extentSelection')
-    extent = extentInput.selection(0).entity
+    scanInput = inputs.itemById('scanValue')
+    if scanInput.value:
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        bodies = hole_scan.world_bodies(design)
+        direction = orientation_axis.geometry.direction
+        holes = hole_scan.find_teardrop_holes(bodies, (direction.x, direction.y, direction.z))
+        futil.log(f'{CMD_NAME} found {len(holes)} holes needing a teardrop')
+    else:
+        edgeInput = inputs.itemById('edgeSelection')
+        extentInput = inputs.itemById('extentSelection')
+        extent = extentInput.selection(0).entity
+        holes = [(edgeInput.selection(i).entity, extent) for i in range(edgeInput.selectionCount)]
 
     flipInput = inputs.itemById('flipSelection')
 
-    create_teardrop(circle, orientation_axis, extent, flipInput.isDirectionFlipped)
+    constrainInput = inputs.itemById('constrainValue')
+
+    lightweightInput = inputs.itemById('lightweightValue')
+    if lightweightInput.value:
+        create_teardrop_bodies(holes, orientation_axis, flipInput.isDirectionFlipped)
+    else:
+        create_teardrops(holes, orientation_axis, flipInput.isDirectionFlipped, constrainInput.value)
 
 
 # This event handler is called when the command needs to compute a new preview in the graphics window.
 def command_preview(args: adsk.core.CommandEventArgs):
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Command Preview Event')
+    futil.log(lambda: f'{CMD_NAME} Command Preview Event')
     inputs = args.command.commandInputs
 
 
@@ -144,17 +175,34 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
     inputs = args.inputs
 
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+
+    # Holes and their end faces are found by the scan, so there is nothing to pick. This stays
+    # in the event, validateInputs reads the selection limits set here as soon as it returns
+    if changed_input.id == 'scanValue':
+        scanning = changed_input.value
+        for input_id in ('edgeSelection', 'extentSelection'):
+            selection_input = inputs.itemById(input_id)
+            selection_input.isVisible = not scanning
+            if scanning:
+                selection_input.clearSelection()
+                selection_input.setSelectionLimits(0, 0)
+            else:
+                selection_input.setSelectionLimits(1, 0 if input_id == 'edgeSelection' else 1)
 
-    
 
 # This event handler is called when the user interacts with any of the inputs in the dialog
 # which allows you to verify that all of the inputs are valid and enables the OK button.
 def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Validate Input Event')
+    futil.log(lambda: f'{CMD_NAME} Validate Input Event')
 
     inputs = args.inputs
+
+    scanInput = inputs.itemById('scanValue')
+    if scanInput.value:
+        args.areInputsValid = inputs.itemById('axisSelection').selectionCount == 1
+        return
     
     # Verify the validity of the input values. This controls if the OK button is enabled or not.
     edgeInput = inputs.itemById('edgeSelection')
@@ -172,53 +220,149 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
+    futil.end_topology_session()
+
     global local_handlers
     local_handlers = []
 
-def create_teardrop(circle: adsk.fusion.BRepEdge, orientation_axis: adsk.fusion.ConstructionAxis, end_plane: adsk.fusion.BRepFace, flip: bool):
-    circle_face = futil.get_circle_face(circle)
-    component = circle_face.body.parentComponent
-    sketches = component.sketches
-    sketch = sketches.add(circle_face)
-
-    sketch.isComputeDeferred = True
-    sketch.project(circle)
-    sketch.project(orientation_axis)
-
-    sketch.isComputeDeferred = False
-    sketch.isComputeDeferred = True
-
-    s_circle = sketch.sketchCurves.sketchCircles[0]
-    s_axis = sketch.sketchCurves.sketchLines[0]
-    center = s_circle.centerSketchPoint
+def draw_teardrop(sketch: adsk.fusion.Sketch, circle: adsk.fusion.BRepEdge, s_axis: adsk.fusion.SketchLine, flip: bool, constrain: bool):
+    s_circle = sketch.project(circle).item(0)
+
+    # Place the teardrop directly instead of leaving it to the constraint solver
+    center = s_circle.centerSketchPoint.geometry
+    axis_start = s_axis.startSketchPoint.geometry
+    axis_end = s_axis.endSketchPoint.geometry
+    apex, tangent1, tangent2 = teardrop_geometry.teardrop_points(
+        (center.x, center.y),
+        s_circle.radius,
+        (axis_end.x - axis_start.x, axis_end.y - axis_start.y),
+        flip
+    )
+
+    lines = sketch.sketchCurves.sketchLines
+    teardrop1 = lines.addByTwoPoints(adsk.core.Point3D.create(apex[0], apex[1], 0), adsk.core.Point3D.create(tangent1[0], tangent1[1], 0))
+    teardrop2 = lines.addByTwoPoints(teardrop1.startSketchPoint, adsk.core.Point3D.create(tangent2[0], tangent2[1], 0))
+
+    if constrain:
+        # The geometry already satisfies these, so the solver has nothing left to move
+        sketch.geometricConstraints.addCoincident(teardrop1.endSketchPoint, s_circle)
+        sketch.geometricConstraints.addCoincident(teardrop2.endSketchPoint, s_circle)
+        sketch.geometricConstraints.addTangent(teardrop1, s_circle)
+        sketch.geometricConstraints.addTangent(teardrop2, s_circle)
+        sketch.geometricConstraints.addPerpendicular(teardrop1, teardrop2)
+
+    return [s_circle, teardrop1, teardrop2]
+
+def create_teardrops(holes: list, orientation_axis: adsk.fusion.ConstructionAxis, flip: bool, constrain: bool = False):
+    """Cuts a teardrop into every hole.
+
+    Arguments:
+    holes -- List of (circular start edge, end face) pairs.
+    orientation_axis -- Axis of print, the teardrops point along it.
+    flip -- Point the teardrops the opposite way.
+    constrain -- Also constrain the teardrop lines to the hole.
+    """
+    # Group the holes by the plane they start on and the face they end at so each group
+    # gets a single sketch and a single cut, however many holes it has
+    groups = dict()
+    for circle, end_plane in holes:
+        circle_face = futil.get_circle_face(circle)
+        key = (futil.get_plane_key(circle_face), end_plane.entityToken)
+        if key not in groups:
+            groups[key] = (circle_face, end_plane, list())
+        groups[key][2].append(circle)
+
+    for circle_face, end_plane, group_circles in groups.values():
+        component = circle_face.body.parentComponent
+        # Faces found in an occurrence are proxies, the sketch is still made in their component
+        sketch = component.sketches.add(circle_face, circle_face.assemblyContext)
+
+        sketch.isComputeDeferred = True
+        s_axis = sketch.project(orientation_axis).item(0)
+        profile_bounds = [draw_teardrop(sketch, circle, s_axis, flip, constrain) for circle in group_circles]
+        sketch.isComputeDeferred = False
+
+        # add extrude through extent
+        extrude_profiles = adsk.core.ObjectCollection.create()
+        for extrude_profile in futil.get_profiles_from_sketch_bounds(sketch, profile_bounds):
+            if extrude_profile is not None:
+                extrude_profiles.add(extrude_profile)
+
+        if extrude_profiles.count > 0:
+            extrude_input = component.features.extrudeFeatures.createInput(extrude_profiles, adsk.fusion.FeatureOperations.CutFeatureOperation)
+            extrude_input.setOneSideExtent(adsk.fusion.ToEntityExtentDefinition.create(end_plane, False), adsk.fusion.ExtentDirections.NegativeExtentDirection)
+            component.features.extrudeFeatures.add(extrude_input)
+
+def create_teardrop_tool(circle: adsk.fusion.BRepEdge, end_plane: adsk.fusion.BRepFace, print_direction: adsk.core.Vector3D, flip: bool) -> adsk.fusion.BRepBody | None:
+    # With the default apex angle the part of the teardrop outside the hole is a square of
+    # side radius with one corner at the hole center, so the tool is a box along the hole
+    hole = circle.geometry
+    normal = hole.normal.copy()
+    normal.normalize()
+
+    # The teardrop points along the print direction in the plane of the hole
+    direction = print_direction.copy()
+    along_normal = normal.copy()
+    along_normal.scaleBy(direction.dotProduct(normal))
+    direction.subtract(along_normal)
+    if direction.length < 1e-9:
+        return None
+    direction.normalize()
     if flip:
-        diff = -s_circle.radius*2
-    else:
-        diff = s_circle.radius*2
-    next_point = adsk.core.Point3D.create(center.geometry.x + diff, center.geometry.y + diff, 0)
-    anchor_line = sketch.sketchCurves.sketchLines.addByTwoPoints(center, next_point)
-    anchor_line.isConstruction = True
-    anchor_point = anchor_line.endSketchPoint
-
-    teardrop1 = sketch.sketchCurves.sketchLines.addByTwoPoints(anchor_point, adsk.core.Point3D.create(anchor_point.geometry.x+1, anchor_point.geometry.y+1,0))
-    teardrop2 = sketch.sketchCurves.sketchLines.addByTwoPoints(anchor_point, adsk.core.Point3D.create(anchor_point.geometry.x+1, anchor_point.geometry.y+1,0))
-    
-    # add constraints
-    sketch.geometricConstraints.addParallel(s_axis, anchor_line)
-    sketch.geometricConstraints.addCoincident(teardrop1.endSketchPoint, s_circle)
-    sketch.geometricConstraints.addCoincident(teardrop2.endSketchPoint, s_circle)
-    sketch.geometricConstraints.addTangent(teardrop1, s_circle)
-    sketch.geometricConstraints.addTangent(teardrop2, s_circle)
-    sketch.geometricConstraints.addPerpendicular(teardrop1, teardrop2)
-
-    sketch.isComputeDeferred = False
-
-    # add extrude through extent
-    profile_bounds = [s_circle, teardrop1, teardrop2]
-    extrude_profile = futil.get_profile_from_sketch_bounds(sketch, profile_bounds)
-
-    if extrude_profile is not None:
-        extrude_input = component.features.extrudeFeatures.createInput(extrude_profile, adsk.fusion.FeatureOperations.CutFeatureOperation)
-        extrude_input.setOneSideExtent(adsk.fusion.ToEntityExtentDefinition.create(end_plane, False), adsk.fusion.ExtentDirections.NegativeExtentDirection)
-        component.features.extrudeFeatures.add(extrude_input)
-
+        direction.scaleBy(-1)
+    side = normal.crossProduct(direction)
+
+    # Length of the hole from its start edge to the end face
+    end = end_plane.geometry
+    denominator = normal.dotProduct(end.normal)
+    if abs(denominator) < 1e-9:
+        return None
+    depth = hole.center.vectorTo(end.origin).dotProduct(end.normal) / denominator
+
+    center = hole.center.copy()
+    offset = direction.copy()
+    offset.scaleBy(hole.radius / math.sqrt(2))
+    center.translateBy(offset)
+    offset = normal.copy()
+    offset.scaleBy(depth / 2)
+    center.translateBy(offset)
+
+    length_direction = direction.copy()
+    length_direction.add(side)
+    width_direction = direction.copy()
+    width_direction.subtract(side)
+    length_direction.normalize()
+    width_direction.normalize()
+
+    box = adsk.core.OrientedBoundingBox3D.create(center, length_direction, width_direction, hole.radius, hole.radius, abs(depth))
+    return adsk.fusion.TemporaryBRepManager.get().createBox(box)
+
+def create_teardrop_bodies(holes: list, orientation_axis: adsk.fusion.ConstructionAxis, flip: bool):
+    """Cuts a teardrop into every hole with one base feature and combine per body.
+
+    Arguments:
+    holes -- List of (circular start edge, end face) pairs.
+    orientation_axis -- Axis of print, the teardrops point along it.
+    flip -- Point the teardrops the opposite way.
+    """
+    print_direction = orientation_axis.geometry.direction
+
+    tools_by_body = dict()
+    for circle, end_plane in holes:
+        # The tool's depth is measured to a plane, extrudes to a curved face need a sketch
+        if end_plane.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+            futil.log(f'{CMD_NAME} skipped a hole ending on a curved face, turn off lightweight output for it')
+            continue
+
+        tool = create_teardrop_tool(circle, end_plane, print_direction, flip)
+        if tool is None:
+            futil.log(f'{CMD_NAME} skipped a hole along the print axis or ending on a face parallel to it')
+            continue
+
+        body = circle.body
+        if body.entityToken not in tools_by_body:
+            tools_by_body[body.entityToken] = (body, list())
+        tools_by_body[body.entityToken][1].append(tool)
+
+    for body, tools in tools_by_body.values():
+        futil.apply_tool_bodies(body, tools, adsk.fusion.FeatureOperations.CutFeatureOperation)
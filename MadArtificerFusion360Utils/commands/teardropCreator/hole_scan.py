@@ -0,0 +1,101 @@
+import adsk.core
+import adsk.fusion
+from collections import defaultdict
+from ...lib import fusionAddInUtils as futil
+from . import teardrop_geometry
+
+
+def index_cylinder_faces(bodies) -> dict:
+    """Groups the cylindrical faces of every body by the direction of their axis.
+
+    Each body's faces are read once, the direction tests then only need to run once per
+    distinct axis direction instead of once per face.
+    """
+    faces_by_direction = defaultdict(list)
+    for body in bodies:
+        for face in body.faces:
+            geometry = face.geometry
+            if geometry.surfaceType != adsk.core.SurfaceTypes.CylinderSurfaceType:
+                continue
+            axis = geometry.axis
+            faces_by_direction[teardrop_geometry.direction_key((axis.x, axis.y, axis.z))].append(face)
+    return faces_by_direction
+
+
+def is_hole(face: adsk.fusion.BRepFace) -> bool:
+    # The surface of a hole faces its axis, the surface of a boss faces away from it
+    cylinder = face.geometry
+    point = face.pointOnFace
+    _, normal = face.evaluator.getNormalAtPoint(point)
+
+    to_point = cylinder.origin.vectorTo(point)
+    axis = cylinder.axis.copy()
+    axis.normalize()
+    axis.scaleBy(to_point.dotProduct(axis))
+    to_point.subtract(axis)
+
+    return normal.dotProduct(to_point) < 0
+
+
+def hole_ends(face: adsk.fusion.BRepFace):
+    """Returns the circular edge a hole starts at and the planar face it ends at, or None
+    when the hole does not end on planar faces at both sides.
+
+    The hole starts at an opening, where the planar face points away from the hole. The bottom
+    of a blind hole points into it, so the teardrop is never sketched on the bottom.
+    """
+    ends = list()
+    for edge in face.edges:
+        if edge.geometry.curveType != adsk.core.Curve3DTypes.Circle3DCurveType:
+            continue
+        planar_face = futil.get_circle_face(edge)
+        if planar_face is not None:
+            ends.append((edge, planar_face))
+
+    if len(ends) != 2:
+        return None
+
+    (start_edge, start_face), (end_edge, end_face) = ends
+    _, normal = start_face.evaluator.getNormalAtPoint(start_face.pointOnFace)
+    if normal.dotProduct(start_edge.geometry.center.vectorTo(end_edge.geometry.center)) > 0:
+        # The first end is the bottom of a blind hole
+        (start_edge, start_face), (end_edge, end_face) = ends[1], ends[0]
+
+    return start_edge, end_face
+
+
+def world_bodies(design: adsk.fusion.Design) -> list:
+    """Bodies of every component in the root's coordinates, so their axes can be compared with
+    the print axis.
+
+    Each component is taken once, through its first occurrence, since the teardrops are cut
+    into the component and so apply to all of its occurrences.
+    """
+    root = design.rootComponent
+    bodies = list(root.bRepBodies)
+    seen = set()
+    for occurrence in root.allOccurrences:
+        component = occurrence.component
+        if component.id in seen:
+            continue
+        seen.add(component.id)
+        bodies.extend(body.createForAssemblyContext(occurrence) for body in component.bRepBodies)
+    return bodies
+
+
+def find_teardrop_holes(bodies, print_direction: tuple) -> list:
+    """Finds the holes whose axis is perpendicular to the print direction.
+
+    :returns:
+        A list of (start edge, end face) pairs ready for create_teardrops.
+    """
+    faces_by_direction = index_cylinder_faces(bodies)
+    holes = list()
+    for direction in teardrop_geometry.perpendicular_directions(list(faces_by_direction.keys()), print_direction):
+        for face in faces_by_direction[direction]:
+            if not is_hole(face):
+                continue
+            ends = hole_ends(face)
+            if ends is not None:
+                holes.append(ends)
+    return holes
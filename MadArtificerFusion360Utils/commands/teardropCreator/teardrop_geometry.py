@@ -0,0 +1,62 @@
+import math
+
+# Apex angle giving 45 degree overhangs, the steepest most printers bridge cleanly
+DEFAULT_APEX_ANGLE = math.pi / 2
+
+
+def teardrop_points(center: tuple, radius: float, axis_direction: tuple, flip: bool = False, apex_angle: float = DEFAULT_APEX_ANGLE):
+    """Computes the teardrop around a circle in closed form.
+
+    The apex lies on the line through the center along axis_direction, far enough out that the
+    two lines from it tangent to the circle meet at apex_angle.
+
+    Arguments:
+    center -- (x, y) of the circle center.
+    radius -- Circle radius.
+    axis_direction -- (x, y) direction the teardrop points to, does not need to be normalized.
+    flip -- Point the teardrop the opposite way.
+    apex_angle -- Angle between the two tangent lines, in radians.
+
+    :returns:
+        The apex and the two tangent points as (x, y) tuples.
+    """
+    dx, dy = axis_direction
+    length = math.hypot(dx, dy)
+    if length == 0.0:
+        raise ValueError('axis_direction must not be zero')
+
+    ux, uy = dx / length, dy / length
+    if flip:
+        ux, uy = -ux, -uy
+
+    cx, cy = center
+    half_angle = apex_angle / 2
+    apex_distance = radius / math.sin(half_angle)
+    apex = (cx + ux * apex_distance, cy + uy * apex_distance)
+
+    # The radius to a tangent point is perpendicular to the tangent line, so it is turned
+    # away from the axis by the complement of the half angle
+    turn = math.pi / 2 - half_angle
+    cos_turn, sin_turn = math.cos(turn), math.sin(turn)
+    tangent1 = (cx + radius * (ux * cos_turn - uy * sin_turn), cy + radius * (ux * sin_turn + uy * cos_turn))
+    tangent2 = (cx + radius * (ux * cos_turn + uy * sin_turn), cy + radius * (-ux * sin_turn + uy * cos_turn))
+
+    return apex, tangent1, tangent2
+
+
+def direction_key(direction: tuple, digits: int = 6) -> tuple:
+    """Normalized direction with a canonical sign, rounded so parallel axes share a key."""
+    x, y, z = direction
+    length = math.sqrt(x * x + y * y + z * z)
+    # Adding 0.0 turns -0.0 into 0.0 so both hash the same
+    x, y, z = round(x / length, digits) + 0.0, round(y / length, digits) + 0.0, round(z / length, digits) + 0.0
+    # Opposite directions describe the same axis
+    if x < 0 or (x == 0 and (y < 0 or (y == 0 and z < 0))):
+        x, y, z = -x + 0.0, -y + 0.0, -z + 0.0
+    return (x, y, z)
+
+
+def perpendicular_directions(directions: list, axis: tuple, tolerance: float = 1e-4) -> list:
+    """Returns the directions perpendicular to axis, all directions being normalized."""
+    ax, ay, az = direction_key(axis)
+    return [direction for direction in directions if abs(direction[0] * ax + direction[1] * ay + direction[2] * az) <= tolerance]
@@ -1,9 +1,11 @@
 import adsk.core
+import math
 import os
 
 import adsk.fusion
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from . import support_geometry
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -83,8 +85,8 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     inputs = args.command.commandInputs
 
     # Where to start teardrop (sketch will be on the plane of this circular edge)
-    start_selection = inputs.addSelectionInput('edgeSelection', "Hole Start", "Select edge of hole")
-    start_selection.setSelectionLimits(1, 1)
+    start_selection = inputs.addSelectionInput('edgeSelection', "Hole Start", "Select edges of holes")
+    start_selection.setSelectionLimits(1, 0)
     start_selection.addSelectionFilter('CircularEdges')
 
     # Number of support layers
@@ -94,6 +96,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     # Support layer thickness
     thickness_input = inputs.addValueInput('thicknessValue', "Layer thickness", "mm", adsk.core.ValueInput.createByString("0.2mm"))
 
+    # The supports are placed exactly either way, constraints only keep them attached on later edits
+    constrain_input = inputs.addBoolValueInput('constrainValue', 'Add constraints', True, '', False)
+
+    # Join every support with one base feature and combine per body instead of sketches and extrudes
+    lightweight_input = inputs.addBoolValueInput('lightweightValue', 'Lightweight output', True, '', False)
+
 
     # TODO Connect to the events that are needed by this command.
     futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
@@ -115,7 +123,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
     inputs = args.command.commandInputs
     
     edgeInput = inputs.itemById('edgeSelection')
-    circle = edgeInput.selection(0).entity
+    circles = [edgeInput.selection(i).entity for i in range(edgeInput.selectionCount)]
 
     num_layers_input = inputs.itemById('numLayersValue')
     num_layers = num_layers_input.value
@@ -123,14 +131,19 @@ def command_execute(args: adsk.core.CommandEventArgs):
     layerThicknessInput = inputs.itemById('thicknessValue')
     layer_thickness = layerThicknessInput.value
 
-    # create_teardrop(circle, orientation_axis, extent, flipInput.isDirectionFlipped)
-    create_supports(circle, num_layers, layer_thickness)
+    constrainInput = inputs.itemById('constrainValue')
+
+    lightweightInput = inputs.itemById('lightweightValue')
+    if lightweightInput.value:
+        create_support_bodies(circles, num_layers, layer_thickness)
+    else:
+        create_supports(circles, num_layers, layer_thickness, constrainInput.value)
 
 
 # This event handler is called when the command needs to compute a new preview in the graphics window.
 def command_preview(args: adsk.core.CommandEventArgs):
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Command Preview Event')
+    futil.log(lambda: f'{CMD_NAME} Command Preview Event')
     inputs = args.command.commandInputs
 
 
@@ -141,15 +154,17 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
     inputs = args.inputs
 
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+
+    # Nothing here is worth deferring, the log is buffered and flushed once Fusion is idle
+    # and the inputs are only looked up when the command executes
 
-    
 
 # This event handler is called when the user interacts with any of the inputs in the dialog
 # which allows you to verify that all of the inputs are valid and enables the OK button.
 def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
     # General logging for debug.
-    futil.log(f'{CMD_NAME} Validate Input Event')
+    futil.log(lambda: f'{CMD_NAME} Validate Input Event')
 
     inputs = args.inputs
     
@@ -165,106 +180,209 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     global local_handlers
     local_handlers = []
 
-# Via ChatGPT
-def is_point_on_same_side(point, line, ref_line):
-    # Get the start and end points of the SketchLine
-    start_point = line.startSketchPoint.geometry
-    end_point = line.endSketchPoint.geometry
-
-    # Define vectors along the SketchLine and from the SketchLine to the point
-    line_vector = adsk.core.Vector3D.create(end_point.x - start_point.x, end_point.y - start_point.y, 0)
-    point_vector = adsk.core.Vector3D.create(point.x - start_point.x, point.y - start_point.y, 0)
-
-    # Get a point on the reference line (use the start point of the reference line)
-    ref_point = ref_line.startSketchPoint.geometry
-    ref_vector = adsk.core.Vector3D.create(ref_point.x - start_point.x, ref_point.y - start_point.y, 0)
-
-    # Calculate the cross product of line_vector with point_vector and ref_vector
-    cross_product_point = line_vector.crossProduct(point_vector)
-    cross_product_ref = line_vector.crossProduct(ref_vector)
-
-    # Determine if the point is on the same side as the reference line
-    same_side = (cross_product_point.z * cross_product_ref.z) >= 0
-
-    return same_side
-
-
-def create_supports(circle: adsk.fusion.BRepEdge, num_layers: int, layer_thickness: float):
-    circle_face = futil.get_circle_face(circle)
-    component = circle_face.body.parentComponent
-    sketches = component.sketches
-    sketch: adsk.fusion.Sketch = sketches.add(circle_face)
-
-    sketch.isComputeDeferred = True
-
+def find_outer_circle(circle: adsk.fusion.BRepEdge, circle_face: adsk.fusion.BRepFace) -> adsk.fusion.BRepEdge | None:
+    # The supports bridge from the hole out to the nearest concentric edge of its face
+    hole = circle.geometry
+    outer = None
     for edge in circle_face.edges:
-        sketch.project(edge)
-
-    assert len(sketch.sketchCurves.sketchCircles) == 2
-
-    if sketch.sketchCurves.sketchCircles[0].geometry.radius < sketch.sketchCurves.sketchCircles[1].geometry.radius:
-        hole_circle = sketch.sketchCurves.sketchCircles[0]
-        outer_circle = sketch.sketchCurves.sketchCircles[1]
-    else:
-        hole_circle = sketch.sketchCurves.sketchCircles[1]
-        outer_circle = sketch.sketchCurves.sketchCircles[0]
-
-    center = hole_circle.centerSketchPoint
-
-    num_sides = num_layers*2
-    pattern = sketch.sketchCurves.sketchLines.addScribedPolygon(center, num_sides, 0, 1.0, False)
-
-    sketch.geometricConstraints.addHorizontal(pattern[0])
-
-    lines = list()
-    for i, line in enumerate(pattern):
-        line.isConstruction = True
+        geometry = edge.geometry
+        if geometry.curveType != adsk.core.Curve3DTypes.Circle3DCurveType:
+            continue
+        if geometry.radius <= hole.radius or not geometry.center.isEqualTo(hole.center):
+            continue
+        if outer is None or geometry.radius < outer.geometry.radius:
+            outer = edge
+
+    return outer
+
+def draw_support_lines(sketch: adsk.fusion.Sketch, circle: adsk.fusion.BRepEdge, outer: adsk.fusion.BRepEdge, num_layers: int, constrain: bool) -> tuple:
+    hole_circle = sketch.project(circle).item(0)
+    outer_circle = sketch.project(outer).item(0)
+
+    # Place the bridging lines directly instead of leaving them to the constraint solver
+    center = hole_circle.centerSketchPoint.geometry
+    layers = support_geometry.support_lines((center.x, center.y), hole_circle.radius, outer_circle.radius, num_layers)
+
+    lines = sketch.sketchCurves.sketchLines
+    strips = list()
+    for pair in layers:
+        for start, end in pair:
+            line = lines.addByTwoPoints(adsk.core.Point3D.create(start[0], start[1], 0), adsk.core.Point3D.create(end[0], end[1], 0))
+            if constrain:
+                # The geometry already satisfies these, so the solver has nothing left to move
+                sketch.geometricConstraints.addCoincident(line.startSketchPoint, outer_circle)
+                sketch.geometricConstraints.addCoincident(line.endSketchPoint, outer_circle)
+                sketch.geometricConstraints.addTangent(line, hole_circle)
+
+        (start, end), (other, _) = pair
+        strips.append(support_geometry.line_strip(start, end, other))
+
+    return (center.x, center.y), outer_circle.radius, strips
+
+def create_supports(circles: list, num_layers: int, layer_thickness: float, constrain: bool = False):
+    """Adds bridging support layers over every hole.
+
+    Holes of a body on the same plane share one sketch and every layer of that sketch is a single
+    extrude, so the number of features does not grow with the number of holes.
+
+    Arguments:
+    circles -- Circular start edges of the holes.
+    num_layers -- Number of support layers.
+    layer_thickness -- Thickness of each layer.
+    constrain -- Also constrain the support lines to the hole.
+    """
+    groups = dict()
+    for circle in circles:
+        circle_face = futil.get_circle_face(circle)
+        outer = find_outer_circle(circle, circle_face)
+        if outer is None:
+            futil.log(f'{CMD_NAME} skipped a hole without a concentric outer edge to bridge to')
+            continue
 
-        # add line which extends all the way to outer_circle
-        new_line = sketch.sketchCurves.sketchLines.addByTwoPoints(adsk.core.Point3D.create(0,0,0), adsk.core.Point3D.create(1,0,0))
-        sketch.geometricConstraints.addCollinear(line, new_line)
-        sketch.geometricConstraints.addCoincident(new_line.startSketchPoint, outer_circle)
-        sketch.geometricConstraints.addCoincident(new_line.endSketchPoint, outer_circle)
+        # Holes of different bodies never share a join, which would merge the bodies
+        key = (futil.get_plane_key(circle_face), circle_face.body.entityToken)
+        if key not in groups:
+            groups[key] = (circle_face, list())
+        groups[key][1].append((circle, outer))
 
-        lines.append(new_line)
+    if len(groups) == 0:
+        return
 
-        if i > 2:
-            # adding constraint to all lines over constrains
-            continue
-        sketch.geometricConstraints.addTangent(line, hole_circle)
+    timeline_indices = list()
+    for circle_face, group_holes in groups.values():
+        component = circle_face.body.parentComponent
+        sketch: adsk.fusion.Sketch = component.sketches.add(circle_face)
 
-    parallel_lines = list()
-    for i in range(num_sides//2):
-        parallel_lines.append((lines[i], lines[num_sides//2+i]))
+        sketch.isComputeDeferred = True
+        holes = [draw_support_lines(sketch, circle, outer, num_layers, constrain) for circle, outer in group_holes]
+        sketch.isComputeDeferred = False
 
-    sketch.isComputeDeferred = False
+        timeline_indices.append(sketch.timelineObject.index)
 
-    # For each set of parallel lines, get all of the outside profiles and
-    # extrude them the correct distance depending on their layer
-    last_index = 0
-    for i, (line1, line2) in enumerate(parallel_lines):
-        extrude_profiles = adsk.core.ObjectCollection.create()
+        # Each profile's centroid is read once, then every profile outside a pair of
+        # parallel lines is extruded the correct distance depending on its layer. The same
+        # layer of every hole in the sketch goes into one extrude.
+        profiles = list()
+        centroids = list()
         for profile in sketch.profiles:
             centroid = profile.areaProperties().centroid
-            if not is_point_on_same_side(centroid, line1, line2) or not is_point_on_same_side(centroid, line2, line1):
-                extrude_profiles.add(profile)
-
-        extrude = component.features.extrudeFeatures.addSimple(extrude_profiles, adsk.core.ValueInput.createByReal(layer_thickness * (i+1)), adsk.fusion.FeatureOperations.JoinFeatureOperation)
-        last_index = extrude.timelineObject.index
+            profiles.append(profile)
+            centroids.append((centroid.x, centroid.y))
+
+        layer_profiles = [adsk.core.ObjectCollection.create() for _ in range(num_layers)]
+        for profile, layer in zip(profiles, support_geometry.profile_layers(centroids, holes)):
+            if layer >= 0:
+                layer_profiles[layer].add(profile)
+
+        for i, extrude_profiles in enumerate(layer_profiles):
+            if extrude_profiles.count == 0:
+                continue
+            extrude = component.features.extrudeFeatures.addSimple(extrude_profiles, adsk.core.ValueInput.createByReal(layer_thickness * (i+1)), adsk.fusion.FeatureOperations.JoinFeatureOperation)
+            timeline_indices.append(extrude.timelineObject.index)
+
+    group_supports(timeline_indices)
+
+def group_supports(timeline_indices: list):
+    # Direct modeling designs have no timeline to group in
+    if app.activeProduct.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return
+
+    # The number is taken before the group exists, so the last group is the previous support group
+    name = f"{FEATURE_NAME}{futil.get_next_name_number(app.activeProduct, FEATURE_NAME)}"
+    support_group = app.activeProduct.timeline.timelineGroups.add(min(timeline_indices), max(timeline_indices))
+
+    support_group.name = name
+
+def create_support_tools(circle: adsk.fusion.BRepEdge, outer: adsk.fusion.BRepEdge, num_layers: int, layer_thickness: float) -> list:
+    # Each layer's profiles are the two segments of the outer circle beyond its chords, so the
+    # tools are the outer cylinder intersected with a box past each chord
+    temp_brep = adsk.fusion.TemporaryBRepManager.get()
+    hole = circle.geometry
+    center = hole.center
+    outer_radius = outer.geometry.radius
+
+    # Supports grow out of the face the hole starts on, like the extrudes on its sketch
+    circle_face = futil.get_circle_face(circle)
+    _, normal = circle_face.evaluator.getNormalAtPoint(circle_face.pointOnFace)
+    normal.normalize()
+
+    # Any fixed direction in the plane of the face works as the horizontal of the layers
+    x_direction = adsk.core.Vector3D.create(1, 0, 0)
+    if abs(x_direction.dotProduct(normal)) > 0.9:
+        x_direction = adsk.core.Vector3D.create(0, 1, 0)
+    along_normal = normal.copy()
+    along_normal.scaleBy(x_direction.dotProduct(normal))
+    x_direction.subtract(along_normal)
+    x_direction.normalize()
+    y_direction = normal.crossProduct(x_direction)
+
+    def to_vector(x, y, z):
+        vector = x_direction.copy()
+        vector.scaleBy(x)
+        other = y_direction.copy()
+        other.scaleBy(y)
+        vector.add(other)
+        other = normal.copy()
+        other.scaleBy(z)
+        vector.add(other)
+        return vector
+
+    def to_point(x, y, z):
+        point = center.copy()
+        point.translateBy(to_vector(x, y, z))
+        return point
+
+    tools = list()
+    layers = support_geometry.support_lines((0.0, 0.0), hole.radius, outer_radius, num_layers)
+    for i, pair in enumerate(layers):
+        height = layer_thickness * (i+1)
+        cylinder = temp_brep.createCylinderOrCone(center, outer_radius, to_point(0, 0, height), outer_radius)
+        for start, end in pair:
+            mid_x, mid_y = (start[0] + end[0]) / 2, (start[1] + end[1]) / 2
+            out_x, out_y = mid_x / hole.radius, mid_y / hole.radius
+            width = outer_radius - hole.radius
+
+            box = adsk.core.OrientedBoundingBox3D.create(
+                to_point(mid_x + out_x * width / 2, mid_y + out_y * width / 2, height / 2),
+                to_vector(-out_y, out_x, 0),
+                to_vector(out_x, out_y, 0),
+                math.hypot(end[0] - start[0], end[1] - start[1]),
+                width,
+                height
+            )
+            segment = temp_brep.createBox(box)
+            temp_brep.booleanOperation(segment, temp_brep.copy(cylinder), adsk.fusion.BooleanTypes.IntersectionBooleanType)
+            tools.append(segment)
+
+    return tools
+
+def create_support_bodies(circles: list, num_layers: int, layer_thickness: float):
+    """Adds bridging support layers over every hole with one base feature and combine per body.
+
+    Arguments:
+    circles -- Circular start edges of the holes.
+    num_layers -- Number of support layers.
+    layer_thickness -- Thickness of each layer.
+    """
+    tools_by_body = dict()
+    for circle in circles:
+        outer = find_outer_circle(circle, futil.get_circle_face(circle))
+        if outer is None:
+            futil.log(f'{CMD_NAME} skipped a hole without a concentric outer edge to bridge to')
+            continue
 
-    support_group = app.activeProduct.timeline.timelineGroups.add(sketch.timelineObject.index, last_index)
+        body = circle.body
+        if body.entityToken not in tools_by_body:
+            tools_by_body[body.entityToken] = (body, list())
+        tools_by_body[body.entityToken][1].extend(create_support_tools(circle, outer, num_layers, layer_thickness))
 
-    max_id = 0
-    for feature in component.parentDesign.rootComponent.features:
-        if feature.name.startswith(FEATURE_NAME):
-            _, id_str = feature.name.split(FEATURE_NAME)
-            if id_str.isdigit():
-                max_id = max(max_id, int(id_str))
+    if len(tools_by_body) == 0:
+        return
 
-    for group in app.activeProduct.timeline.timelineGroups:
-        if group.name.startswith(FEATURE_NAME):
-            _, id_str = group.name.split(FEATURE_NAME)
-            if id_str.isdigit():
-                max_id = max(max_id, int(id_str))
+    timeline_indices = list()
+    for body, tools in tools_by_body.values():
+        for feature in futil.apply_tool_bodies(body, tools, adsk.fusion.FeatureOperations.JoinFeatureOperation):
+            if feature.timelineObject is not None:
+                timeline_indices.append(feature.timelineObject.index)
 
-    support_group.name = f"{FEATURE_NAME}{max_id+1}"
+    group_supports(timeline_indices)
@@ -0,0 +1,89 @@
+import math
+
+
+def support_lines(center: tuple, hole_radius: float, outer_radius: float, num_layers: int) -> list:
+    """Computes the bridging lines of every support layer in closed form.
+
+    Each layer is a pair of parallel chords of the outer circle, tangent to the hole on
+    opposite sides. The first layer is horizontal and each following layer is turned by
+    180 / num_layers degrees, the same lines a regular polygon around the hole would give.
+
+    Arguments:
+    center -- (x, y) of the hole center.
+    hole_radius -- Radius of the hole.
+    outer_radius -- Radius of the circle the supports bridge to.
+    num_layers -- Number of support layers.
+
+    :returns:
+        A list with a pair of lines per layer, each line being a (start, end) pair of (x, y) tuples.
+    """
+    if outer_radius <= hole_radius:
+        raise ValueError('outer_radius must be larger than hole_radius')
+
+    cx, cy = center
+    # Half the length of a chord at hole_radius from the center
+    half_chord = math.sqrt(outer_radius * outer_radius - hole_radius * hole_radius)
+
+    layers = list()
+    for i in range(num_layers):
+        angle = math.pi / 2 + i * math.pi / num_layers
+        nx, ny = math.cos(angle), math.sin(angle)
+        pair = list()
+        for side in (hole_radius, -hole_radius):
+            mx, my = cx + nx * side, cy + ny * side
+            pair.append(((mx + ny * half_chord, my - nx * half_chord), (mx - ny * half_chord, my + nx * half_chord)))
+        layers.append(tuple(pair))
+    return layers
+
+
+def line_strip(start: tuple, end: tuple, other: tuple) -> tuple:
+    """Half-plane form of the strip between two parallel lines.
+
+    Arguments:
+    start -- (x, y) of a point on the first line.
+    end -- (x, y) of another point on the first line.
+    other -- (x, y) of a point on the second line.
+
+    :returns:
+        (nx, ny, low, high), a point p lies in the strip when low <= nx*p.x + ny*p.y <= high.
+    """
+    nx, ny = start[1] - end[1], end[0] - start[0]
+    offset1 = nx * start[0] + ny * start[1]
+    offset2 = nx * other[0] + ny * other[1]
+    return (nx, ny, min(offset1, offset2), max(offset1, offset2))
+
+
+def support_layer(point: tuple, strips: list) -> int:
+    """Index of the last strip the point lies outside of, or -1 when it is inside all of them."""
+    x, y = point
+    layer = -1
+    for i, (nx, ny, low, high) in enumerate(strips):
+        offset = nx * x + ny * y
+        if offset < low or offset > high:
+            layer = i
+    return layer
+
+
+def profile_layers(centroids: list, holes: list) -> list:
+    """Works out the support layer of every profile in a single pass over their centroids.
+
+    A profile outside several strips is covered by the extrude of the last one, which is the
+    tallest, so it only needs to be extruded once.
+
+    Arguments:
+    centroids -- (x, y) of each profile centroid.
+    holes -- (center, outer radius, strips) of each hole, the strips ordered by layer.
+
+    :returns:
+        The layer of each profile, -1 for profiles which get no support.
+    """
+    layers = list()
+    for x, y in centroids:
+        layer = -1
+        for (cx, cy), radius, strips in holes:
+            dx, dy = x - cx, y - cy
+            if dx * dx + dy * dy < radius * radius:
+                layer = support_layer((x, y), strips)
+                break
+        layers.append(layer)
+    return layers
@@ -4,6 +4,8 @@
 
 import os
 
+import adsk.core
+
 # Flag that indicates to run in Debug mode or not. When running in Debug mode
 # more information is written to the Text Command window. Generally, it's useful
 # to set this to True while developing an add-in and set it to False when you
@@ -15,3 +17,11 @@ DEBUG = True
 # that need a unique name. It's also recommended to use a company name as 
 # part of the ID to better ensure the ID is unique.
 ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
+
+# Records the wall time and number of API calls of every event handler so slow handlers can
+# be found, see fusionAddInUtils/handler_timing.py. Adds overhead to every event, keep it off
+# unless you are profiling.
+PROFILE_HANDLERS = False
+
+# Lowest level of the messages logged, lower ones are dropped before they are even built.
+LOG_LEVEL = adsk.core.LogLevels.InfoLogLevel
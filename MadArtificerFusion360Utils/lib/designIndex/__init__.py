@@ -0,0 +1 @@
+from .design_index import *
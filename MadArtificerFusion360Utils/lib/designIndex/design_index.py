@@ -0,0 +1,165 @@
+from collections import defaultdict
+
+import adsk.core
+import adsk.fusion
+from .. import fusionAddInUtils as futil
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Design index of every open document, keyed by the document's creation id
+_indexes = {}
+
+
+class ComponentEntry:
+    def __init__(self, component: adsk.fusion.Component, revision: int):
+        # Index revision the entry was last read at
+        self.revision = revision
+        self.name = component.name
+        self.revision_id = component.revisionId
+        self.is_part = component.occurrences.count == 0
+        self.material = component.material.name
+
+
+class DesignIndex:
+    """Cached per component facts of a design: whether it is a part, its material, its
+    occurrence count and the occurrence paths it is used at.
+
+    Edits only mark the index dirty. The next refresh compares every component's revisionId
+    against the cached one and only re-reads the components that changed, the occurrence
+    tree is only walked again when an assembly changed.
+    """
+
+    def __init__(self, design: adsk.fusion.Design):
+        self.design = design
+        self.entries = {}
+        self.counts = defaultdict(int)
+        self.paths = defaultdict(list)
+        self.changed_ids = set()
+        # Bumped by every refresh that found a change
+        self.revision = 0
+        self._dirty = True
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def refresh(self) -> set:
+        """Brings the index up to date with the design.
+
+        :returns:
+            The ids of the components that were added or changed since the last refresh.
+        """
+        if not self._dirty:
+            return set()
+
+        changed = set()
+        revision = self.revision + 1
+        assembly_changed = False
+        present = set()
+        for component in self.design.allComponents:
+            component_id = component.id
+            present.add(component_id)
+            entry = self.entries.get(component_id)
+            if entry is not None and entry.revision_id == component.revisionId:
+                continue
+
+            # A component that is or was an assembly changes the occurrence tree
+            if entry is not None and not entry.is_part:
+                assembly_changed = True
+
+            entry = ComponentEntry(component, revision)
+            self.entries[component_id] = entry
+            changed.add(component_id)
+            if not entry.is_part:
+                assembly_changed = True
+
+        removed = self.entries.keys() - present
+        for component_id in removed:
+            del self.entries[component_id]
+
+        if assembly_changed or len(removed) > 0:
+            self._index_occurrences()
+
+        if len(changed) > 0 or len(removed) > 0:
+            self.revision = revision
+
+        self._dirty = False
+        self.changed_ids = changed
+        return changed
+
+    def _index_occurrences(self):
+        self.counts = defaultdict(int)
+        self.paths = defaultdict(list)
+
+        stack = [(self.design.rootComponent.occurrences, "")]
+        while stack:
+            occurrences, parent_path = stack.pop()
+            for occurrence in occurrences:
+                path = f"{parent_path}/{occurrence.name}" if parent_path else occurrence.name
+                component_id = occurrence.component.id
+                self.counts[component_id] += 1
+                self.paths[component_id].append(path)
+
+                child_occurrences = occurrence.childOccurrences
+                if child_occurrences.count > 0:
+                    stack.append((child_occurrences, path))
+
+    def changed_since(self, revision: int):
+        """Yields (component id, entry) for every component read after the given revision.
+
+        Lets several consumers each catch up on the changes they have not seen yet, whoever
+        triggered the refresh. Removed components are the ones no longer in entries.
+        """
+        for component_id, entry in self.entries.items():
+            if entry.revision > revision:
+                yield component_id, entry
+
+    def parts(self):
+        """Yields (component id, entry) for every part in the design."""
+        for component_id, entry in self.entries.items():
+            if entry.is_part:
+                yield component_id, entry
+
+
+def get_design_index(design: adsk.fusion.Design = None) -> DesignIndex:
+    """Returns the up to date index of a design, the active one by default."""
+    if design is None:
+        design = adsk.fusion.Design.cast(app.activeProduct)
+
+    document_id = design.parentDocument.creationId
+    index = _indexes.get(document_id)
+    if index is None:
+        index = DesignIndex(design)
+        _indexes[document_id] = index
+
+    index.refresh()
+    return index
+
+
+def start():
+    # Any command may edit the design, the index is re-checked lazily when next used
+    futil.add_handler(ui.commandTerminated, _command_terminated, name='designIndexCommandTerminated')
+    futil.add_handler(app.documentClosed, _document_closed, name='designIndexDocumentClosed')
+
+
+def stop():
+    _indexes.clear()
+
+
+def _command_terminated(args: adsk.core.ApplicationCommandEventArgs):
+    # Cancelled commands leave the design as it was
+    if args.terminationReason == adsk.core.CommandTerminationReason.CancelledTerminationReason:
+        return
+
+    document = app.activeDocument
+    if document is None:
+        return
+
+    index = _indexes.get(document.creationId)
+    if index is not None:
+        index.mark_dirty()
+
+
+def _document_closed(args: adsk.core.DocumentEventArgs):
+    for document_id in [document_id for document_id, index in _indexes.items() if not index.design.isValid]:
+        del _indexes[document_id]
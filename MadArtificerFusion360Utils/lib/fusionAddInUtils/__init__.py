@@ -1,2 +1,4 @@
 from .general_utils import *
 from .event_utils import *
+from .topology_cache import *
+from .handler_timing import set_handler_timing, handler_timings, export_handler_timings, clear_handler_timings
@@ -10,15 +10,31 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import sys
+import threading
+from collections import OrderedDict
 from typing import Callable
 
 import adsk.core
 from .general_utils import handle_error
+from . import handler_timing
+
+app = adsk.core.Application.get()
 
 
 # Global Variable to hold Event Handlers
 _handlers = []
 
+# Custom event every deferred handler runs from, registered on first use. The module name
+# includes the add-in's package, so it does not clash with other add-ins using this template.
+_DEFERRED_EVENT_ID = f'{__name__}_deferred'
+_deferred_event = None
+# Debounced handlers whose timer is running, and handlers due to run in the order they became due
+_waiting = dict()
+_due = OrderedDict()
+_due_fired = False
+# Debounce timers mark handlers due from their own threads
+_due_lock = threading.Lock()
+
 
 def add_handler(
         event: adsk.core.Event,
@@ -53,12 +69,145 @@ def add_handler(
     return handler
 
 
+def add_deferred_handler(
+        event: adsk.core.Event,
+        callback: Callable,
+        *,
+        delay: float = 0.0,
+        name: str = None,
+        local_handlers: list = None
+):
+    """Adds an event handler that runs once Fusion is idle instead of inside the event.
+
+    A burst of events only runs the callback once, with the args of the latest event. With a
+    delay the callback is debounced, it runs once the event has not fired for that long.
+
+    Only use it for events whose handlers do not answer through their args, validateInputs
+    and executePreview have to set their results before the event returns. The same goes for
+    inputChanged handlers that update other inputs, validateInputs runs straight after them.
+
+    Arguments:
+    event -- The event object you want to connect a handler to.
+    callback -- The function that will handle the event.
+    delay -- Seconds without a new event before the callback runs, 0 to run on the next idle.
+    name -- A name to use in logging errors associated with this event.
+    local_handlers -- A list of handlers you manage, as in add_handler.
+
+    :returns:
+        The DeferredHandler, whose cancel method drops a pending call.
+    """
+    deferred = DeferredHandler(callback, delay, name)
+    add_handler(event, deferred.schedule, name=name, local_handlers=local_handlers)
+    return deferred
+
+
+# Args of a DeferredHandler with no call pending, None is a valid args value
+_NO_ARGS = object()
+
+
+class DeferredHandler:
+    def __init__(self, callback: Callable, delay: float = 0.0, name: str = None):
+        self.callback = callback
+        self.delay = delay
+        self.name = name or callback.__name__
+        self._args = _NO_ARGS
+        self._timer = None
+
+    def schedule(self, args):
+        _register_deferred_event()
+
+        # Only the latest args are kept, earlier events of the burst are superseded
+        self._args = args
+        if self.delay > 0:
+            timer = threading.Timer(self.delay, _set_due)
+            timer.args = (self, timer)
+            timer.daemon = True
+            with _due_lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = timer
+                _waiting[id(self)] = self
+                # A call already due but not yet run waits for the new timer instead
+                _due.pop(id(self), None)
+            timer.start()
+        else:
+            _set_due(self)
+
+    def cancel(self):
+        self._args = _NO_ARGS
+        with _due_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            _waiting.pop(id(self), None)
+            _due.pop(id(self), None)
+
+    def run(self):
+        args = self._args
+        if args is _NO_ARGS:
+            return
+        self._args = _NO_ARGS
+        try:
+            if handler_timing.ENABLED:
+                handler_timing.timed_call(self.callback, args, _callback_command(self.callback), self.name)
+            else:
+                self.callback(args)
+        except:
+            handle_error(self.name)
+
+
+def _register_deferred_event():
+    # Registered from the main thread, timers only fire it
+    global _deferred_event
+    if _deferred_event is None:
+        _deferred_event = app.registerCustomEvent(_DEFERRED_EVENT_ID)
+        add_handler(_deferred_event, _run_due, name='deferredHandlers')
+
+
+def _set_due(deferred: DeferredHandler, timer: threading.Timer = None):
+    global _due_fired
+    with _due_lock:
+        if timer is not None:
+            # A timer cancelled too late to stop it was superseded by a newer one or a cancel
+            if deferred._timer is not timer:
+                return
+            deferred._timer = None
+        _waiting.pop(id(deferred), None)
+        _due[id(deferred)] = deferred
+        # One custom event runs every handler due by the time Fusion gets to it
+        if not _due_fired:
+            _due_fired = True
+            app.fireCustomEvent(_DEFERRED_EVENT_ID)
+
+
+def _run_due(args: adsk.core.CustomEventArgs):
+    global _due_fired
+    with _due_lock:
+        due = list(_due.values())
+        _due.clear()
+        _due_fired = False
+
+    for deferred in due:
+        deferred.run()
+
+
 def clear_handlers():
     """Clears the global list of handlers.
     """
-    global _handlers
+    global _handlers, _deferred_event, _due_fired
     _handlers = []
 
+    # Pending deferred calls would otherwise run after the add-in stopped
+    with _due_lock:
+        pending = list(_waiting.values()) + list(_due.values())
+    for deferred in pending:
+        deferred.cancel()
+    _due_fired = False
+
+    if _deferred_event is not None:
+        app.unregisterCustomEvent(_DEFERRED_EVENT_ID)
+        _deferred_event = None
+
 
 def _create_handler(
         handler_type,
@@ -72,8 +221,17 @@ def _create_handler(
     return handler
 
 
+def _callback_command(callback) -> str:
+    # Handlers of a command are labeled with its CMD_ID, anything else with its module
+    module = sys.modules.get(getattr(callback, '__module__', None))
+    if module is None:
+        return 'unknown'
+    return getattr(module, 'CMD_ID', module.__name__)
+
+
 def _define_handler(handler_type, callback, name: str = None):
     name = name or handler_type.__name__
+    command = _callback_command(callback)
 
     class Handler(handler_type):
         def __init__(self):
@@ -81,7 +239,10 @@ def _define_handler(handler_type, callback, name: str = None):
 
         def notify(self, args):
             try:
-                callback(args)
+                if handler_timing.ENABLED:
+                    handler_timing.timed_call(callback, args, command, name)
+                else:
+                    callback(args)
             except:
                 handle_error(name)
 
@@ -9,10 +9,15 @@
 #  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
 #  UNINTERRUPTED OR ERROR FREE.
 
+import logging
+import logging.handlers
 import os
+import threading
+import time
 import traceback
-from typing import List
+from typing import Callable, List
 import adsk.core
+from .topology_cache import get_circle_topology
 
 app = adsk.core.Application.get()
 ui = app.userInterface
@@ -24,27 +29,149 @@ try:
 except:
     DEBUG = False
 
+# Messages below this level are dropped before they are built or buffered
+try:
+    LOG_LEVEL = config.LOG_LEVEL
+except:
+    LOG_LEVEL = adsk.core.LogLevels.InfoLogLevel
+
+# Severity of each level, ranked here rather than relying on the order of the LogLevels values
+_LOG_LEVEL_RANKS = {
+    adsk.core.LogLevels.InfoLogLevel: 0,
+    adsk.core.LogLevels.WarningLogLevel: 1,
+    adsk.core.LogLevels.ErrorLogLevel: 2,
+}
+
+# Buffered messages are written once Fusion is idle, or right away once there are this many
+# or the oldest has waited this many seconds
+LOG_BUFFER_SIZE = 50
+LOG_FLUSH_SECONDS = 0.5
+
+# Errors are also written to a file in the add-in folder, rotated at this size
+ERROR_LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'logs', 'errors.log')
+ERROR_LOG_MAX_BYTES = 1024 * 1024
+ERROR_LOG_BACKUPS = 3
+
+# (level, message, to_console) of messages not yet written, and when the oldest was logged
+_log_buffer = []
+_log_buffer_time = 0.0
+_log_flush = None
+_idle_flush = True
+_error_logger = None
+
+# (sketch key, index) of the last profile index built
+_profile_index = None
+
+# Attribute group the name counters are kept in, fixed so they survive renaming the add-in folder
+NAME_COUNTER_GROUP = 'MadArtificerFusion360Utils'
 
-def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
+
+def log(message: str | Callable[[], str], level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
     """Utility function to easily handle logging in your app.
 
+    Messages are buffered and written in batches, errors are written right away.
+
     Arguments:
-    message -- The message to log.
+    message -- The message to log, or a function returning it so it is only built when it
+               passes the level filter.
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
     """    
-    # Always print to console, only seen through IDE.
-    print(message)  
+    global _log_buffer_time
+    if _LOG_LEVEL_RANKS.get(level, 0) < _LOG_LEVEL_RANKS.get(LOG_LEVEL, 0):
+        return
+    if callable(message):
+        message = message()
 
-    # Log all errors to Fusion log file.
+    # If config.DEBUG is True write all log messages to the console.
+    to_console = DEBUG or force_console
+
+    # Log all errors to Fusion log file and our own, after what was logged before them.
     if level == adsk.core.LogLevels.ErrorLogLevel:
-        log_type = adsk.core.LogTypes.FileLogType
-        app.log(message, level, log_type)
+        flush_log()
+        print(message)
+        app.log(message, level, adsk.core.LogTypes.FileLogType)
+        _write_error_file(message)
+        if to_console:
+            app.log(message, level, adsk.core.LogTypes.ConsoleLogType)
+        return
 
-    # If config.DEBUG is True write all log messages to the console.
-    if DEBUG or force_console:
-        log_type = adsk.core.LogTypes.ConsoleLogType
-        app.log(message, level, log_type)
+    # Always print to console, only seen through IDE.
+    if len(_log_buffer) == 0:
+        _log_buffer_time = time.monotonic()
+        _schedule_log_flush()
+    _log_buffer.append((level, message, to_console))
+
+    # Once the log is closed nothing flushes it at idle any more, so write straight away
+    if not _idle_flush or len(_log_buffer) >= LOG_BUFFER_SIZE or time.monotonic() - _log_buffer_time >= LOG_FLUSH_SECONDS:
+        flush_log()
+
+
+def flush_log():
+    """Writes out every buffered log message."""
+    global _log_buffer
+    if len(_log_buffer) == 0:
+        return
+    buffer, _log_buffer = _log_buffer, []
+
+    print('\n'.join(message for _, message, _ in buffer))
+
+    # Consecutive console messages of the same level go out in a single call
+    run_level = None
+    run = list()
+    for level, message, to_console in buffer:
+        if not to_console:
+            continue
+        if level != run_level and len(run) > 0:
+            app.log('\n'.join(run), run_level, adsk.core.LogTypes.ConsoleLogType)
+            run = list()
+        run_level = level
+        run.append(message)
+    if len(run) > 0:
+        app.log('\n'.join(run), run_level, adsk.core.LogTypes.ConsoleLogType)
+
+
+def close_log():
+    """Flushes the log and closes the error file, call before the add-in's handlers are cleared.
+
+    Messages logged afterwards are written right away instead of being buffered.
+    """
+    global _idle_flush, _error_logger
+    _idle_flush = False
+    flush_log()
+    if _error_logger is not None:
+        for handler in list(_error_logger.handlers):
+            handler.close()
+            _error_logger.removeHandler(handler)
+        _error_logger = None
+
+
+def _schedule_log_flush():
+    global _log_flush
+    # Custom events can only be registered from the main thread, other threads rely on the thresholds
+    if not _idle_flush or threading.current_thread() is not threading.main_thread():
+        return
+    if _log_flush is None:
+        # Imported here since event_utils itself logs through this module
+        from .event_utils import DeferredHandler
+        _log_flush = DeferredHandler(lambda args: flush_log(), name='flushLog')
+    _log_flush.schedule(None)
+
+
+def _write_error_file(message: str):
+    global _error_logger
+    try:
+        if _error_logger is None:
+            os.makedirs(os.path.dirname(ERROR_LOG_FILE), exist_ok=True)
+            _error_logger = logging.getLogger(f'{__name__}.errors')
+            _error_logger.propagate = False
+            handler = logging.handlers.RotatingFileHandler(ERROR_LOG_FILE, maxBytes=ERROR_LOG_MAX_BYTES, backupCount=ERROR_LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            _error_logger.addHandler(handler)
+        _error_logger.error(message)
+    except OSError:
+        # The Fusion log file still has the error
+        pass
 
 
 def handle_error(name: str, show_message_box: bool = False):
@@ -64,27 +191,186 @@ def handle_error(name: str, show_message_box: bool = False):
     if show_message_box:
         ui.messageBox(f'{name}\n{traceback.format_exc()}')
 
+def _bounds_key(curves: list) -> tuple:
+    # API objects are not guaranteed to hash or compare the same, their entity tokens are. The
+    # count tells a loop using a curve twice, such as two arcs of one circle, from one using it once
+    return (frozenset(curve.entityToken for curve in curves), len(curves))
+
+def _sketch_index_key(sketch: adsk.fusion.Sketch) -> tuple:
+    # Any edit of the sketch changes its revision, recomputing it can change its profiles
+    return (sketch.entityToken, sketch.revisionId, sketch.profiles.count)
+
+def build_profile_index(sketch: adsk.fusion.Sketch) -> dict:
+    """Maps the set and number of curves bounding each profile loop to its profile.
+
+    Build it once after the sketch is computed, every lookup is then a dictionary access
+    instead of a walk over all profiles, loops and curves. The last index built is kept until
+    the sketch changes.
+    """
+    global _profile_index
+    key = _sketch_index_key(sketch)
+    if _profile_index is not None and _profile_index[0] == key:
+        return _profile_index[1]
+
+    index = dict()
+    for profile in sketch.profiles:
+        for loop in profile.profileLoops:
+            curve_key = _bounds_key([entity.sketchEntity for entity in loop.profileCurves])
+            # Keep the first match, like a linear search would
+            index.setdefault(curve_key, profile)
+
+    _profile_index = (key, index)
+    return index
+
+def get_profiles_from_sketch_bounds(sketch: adsk.fusion.Sketch, bounds_list: List[List[adsk.fusion.SketchCurve]], index: dict = None) -> list:
+    """Resolves many sets of bounding curves with a single pass over the sketch's profiles.
+
+    Arguments:
+    sketch -- The sketch the profiles are in.
+    bounds_list -- The curves bounding each profile.
+    index -- An index from build_profile_index, built here when not given.
+
+    :returns:
+        The profile bounded by each set of curves, None where there is none.
+    """
+    if index is None:
+        index = build_profile_index(sketch)
+    return [index.get(_bounds_key(bounds)) for bounds in bounds_list]
+
 def get_profile_from_sketch_bounds(sketch: adsk.fusion.Sketch, bounds: List[adsk.fusion.SketchCurve]):
+    # An index already built for the sketch answers straight away, building one for a single
+    # lookup costs more than a search which stops at the first match. Both compare the same key.
+    key = _bounds_key(bounds)
+    if _profile_index is not None and _profile_index[0] == _sketch_index_key(sketch):
+        return _profile_index[1].get(key)
+
+    bound_tokens, bound_count = key
     for profile in sketch.profiles:
         for loop in profile.profileLoops:
-            if len(loop.profileCurves) == len(bounds):
-                resolved_bounds = 0
-                for entity in loop.profileCurves:
-                    if entity.sketchEntity in bounds:
-                        resolved_bounds += 1
-                    else:
-                        break
-                if resolved_bounds == len(bounds):
+            curves = loop.profileCurves
+            if curves.count != bound_count:
+                continue
+            tokens = set()
+            for entity in curves:
+                token = entity.sketchEntity.entityToken
+                if token not in bound_tokens:
+                    break
+                tokens.add(token)
+            else:
+                if tokens == bound_tokens:
                     return profile
-                
+
     return None
 
 def get_circle_face(circle: adsk.fusion.BRepEdge) -> adsk.fusion.BRepFace | None:
-    faces = circle.faces
-    plane = None
-    for i in range(faces.count):
-        face: adsk.fusion.BRepFace = faces.item(i)
-        if face.geometry.surfaceType == adsk.core.SurfaceTypes.PlaneSurfaceType:
-            plane = face
-
-    return plane
+    # Read through the topology cache, the faces of an edge only change with its body
+    return get_circle_topology(circle).planar_face
+
+def get_plane_key(face: adsk.fusion.BRepFace) -> tuple:
+    """Returns a hashable key shared by the planar faces of a component that lie in the same plane,
+    so features on them can share a sketch.
+    """
+    plane = face.geometry
+    normal = plane.normal
+    offset = normal.x * plane.origin.x + normal.y * plane.origin.y + normal.z * plane.origin.z
+    return (
+        face.body.parentComponent.id,
+        round(normal.x, 6), round(normal.y, 6), round(normal.z, 6),
+        round(offset, 6)
+    )
+
+def get_highest_name_number(design: adsk.fusion.Design, prefix: str) -> int:
+    """Scans every root feature and timeline group for names like <prefix>N and returns the highest N, 0 if none."""
+    max_id = 0
+    for feature in design.rootComponent.features:
+        if feature.name.startswith(prefix):
+            _, id_str = feature.name.split(prefix, 1)
+            if id_str.isdigit():
+                max_id = max(max_id, int(id_str))
+
+    for group in design.timeline.timelineGroups:
+        if group.name.startswith(prefix):
+            _, id_str = group.name.split(prefix, 1)
+            if id_str.isdigit():
+                max_id = max(max_id, int(id_str))
+
+    return max_id
+
+def get_next_name_number(design: adsk.fusion.Design, prefix: str) -> int:
+    """Returns the next free N for a name like <prefix>N.
+
+    The last number handed out is stored in the design's attributes, so this takes constant time
+    however long the timeline is. Designs without the attribute, such as ones edited before it
+    existed, or with a stale one are scanned once instead.
+
+    Arguments:
+    design -- The design the name will be used in.
+    prefix -- The name without its number.
+    """
+    attribute_name = f'{prefix}Counter'
+    attribute = design.attributes.itemByName(NAME_COUNTER_GROUP, attribute_name)
+    number = None
+    if attribute is not None and attribute.value.isdigit():
+        number = int(attribute.value) + 1
+
+    # A name taken behind the counter's back, for example by hand or by undoing past the
+    # attribute change, means it is stale. Names go to timeline groups, which cannot be looked
+    # up by name, but a group made since the counter was written is the last in the timeline
+    if number is None or design.rootComponent.features.itemByName(f'{prefix}{number}') is not None:
+        number = get_highest_name_number(design, prefix) + 1
+    else:
+        groups = design.timeline.timelineGroups
+        if groups.count > 0:
+            name = groups.item(groups.count - 1).name
+            if name.startswith(prefix) and name[len(prefix):].isdigit() and int(name[len(prefix):]) >= number:
+                number = get_highest_name_number(design, prefix) + 1
+
+    # Adding an existing attribute replaces its value
+    design.attributes.add(NAME_COUNTER_GROUP, attribute_name, str(number))
+    return number
+
+def apply_tool_bodies(target: adsk.fusion.BRepBody, tools: list, operation: adsk.fusion.FeatureOperations) -> list:
+    """Joins or cuts temporary bodies into a body with a single base feature and combine.
+
+    The tools are merged into one body first, so the timeline only gains two entries however
+    many tools there are, and neither needs a sketch or solver to recompute. Direct modeling
+    designs have no base features, the tool is added as a plain body there.
+
+    Arguments:
+    target -- The body to modify, may be a proxy.
+    tools -- Temporary BRep bodies in the same coordinates as target.
+    operation -- JoinFeatureOperation or CutFeatureOperation.
+
+    :returns:
+        The base feature and the combine feature, only the combine in direct modeling designs.
+    """
+    temp_brep = adsk.fusion.TemporaryBRepManager.get()
+    tool = tools[0]
+    for other in tools[1:]:
+        temp_brep.booleanOperation(tool, other, adsk.fusion.BooleanTypes.UnionBooleanType)
+
+    # Features are added to the body's own component, so bring the tool into its coordinates
+    if target.assemblyContext is not None:
+        transform = target.assemblyContext.transform2
+        transform.invert()
+        temp_brep.transform(tool, transform)
+        target = target.nativeObject
+
+    component = target.parentComponent
+    features = list()
+    tool_bodies = adsk.core.ObjectCollection.create()
+    if component.parentDesign.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        base_feature = component.features.baseFeatures.add()
+        base_feature.startEdit()
+        component.bRepBodies.add(tool, base_feature)
+        base_feature.finishEdit()
+        tool_bodies.add(base_feature.bodies.item(0))
+        features.append(base_feature)
+    else:
+        tool_bodies.add(component.bRepBodies.add(tool))
+
+    combine_input = component.features.combineFeatures.createInput(target, tool_bodies)
+    combine_input.operation = operation
+    features.append(component.features.combineFeatures.add(combine_input))
+
+    return features
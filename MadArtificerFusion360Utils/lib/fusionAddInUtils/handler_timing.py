@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+from collections import deque
+
+# Attempt to read PROFILE_HANDLERS flag from parent config.
+try:
+    from ... import config
+    ENABLED = config.PROFILE_HANDLERS
+except:
+    ENABLED = False
+
+# Handler runs kept, the oldest are dropped first
+RING_SIZE = 4096
+
+# Builtin functions of these modules are calls into Fusion
+_API_MODULES = ('adsk', '_core', '_fusion', '_cam')
+
+# (command, event, callback, start, seconds, api calls) of the latest handler runs
+_records = deque(maxlen=RING_SIZE)
+
+
+def set_handler_timing(enabled: bool):
+    """Turns recording on or off without restarting the add-in, e.g. from the Text Commands window."""
+    global ENABLED
+    ENABLED = enabled
+
+
+class _ApiCallCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, frame, event, arg):
+        if event == 'c_call' and (getattr(arg, '__module__', None) or '').startswith(_API_MODULES):
+            self.count += 1
+
+
+def timed_call(callback, args, command: str, event: str):
+    """Runs a handler's callback and records its wall time and API call count."""
+    counter = _ApiCallCounter()
+    previous_profile = sys.getprofile()
+    sys.setprofile(counter)
+    start = time.perf_counter()
+    try:
+        callback(args)
+    finally:
+        seconds = time.perf_counter() - start
+        sys.setprofile(previous_profile)
+        _records.append((command, event, getattr(callback, '__name__', repr(callback)), start, seconds, counter.count))
+
+
+def handler_timings() -> list:
+    """Totals of the recorded runs per command, event and callback, slowest first."""
+    totals = dict()
+    for command, event, callback, _, seconds, api_calls in _records:
+        key = (command, event, callback)
+        if key not in totals:
+            totals[key] = {"command": command, "event": event, "callback": callback, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "api_calls": 0}
+        entry = totals[key]
+        entry["calls"] += 1
+        entry["total_ms"] += seconds * 1000.0
+        entry["max_ms"] = max(entry["max_ms"], seconds * 1000.0)
+        entry["api_calls"] += api_calls
+
+    return sorted(totals.values(), key=lambda entry: entry["total_ms"], reverse=True)
+
+
+def export_handler_timings(filename: str, format: str = "json"):
+    """Writes the recorded handler runs to a file.
+
+    Arguments:
+    filename -- File to write.
+    format -- "json" for the totals and every recorded run, "folded" for one
+              "command;event;callback microseconds" line per handler, as read by flame graph tools.
+    """
+    if format == "json":
+        runs = [
+            {"command": command, "event": event, "callback": callback, "start": start, "ms": seconds * 1000.0, "api_calls": api_calls}
+            for command, event, callback, start, seconds, api_calls in _records
+        ]
+        with open(filename, "w") as timing_file:
+            json.dump({"handlers": handler_timings(), "runs": runs}, timing_file, indent=2)
+    elif format == "folded":
+        with open(filename, "w") as timing_file:
+            for entry in handler_timings():
+                timing_file.write(f'{entry["command"]};{entry["event"]};{entry["callback"]} {round(entry["total_ms"] * 1000)}\n')
+    else:
+        raise ValueError(f'Unknown handler timing format {format}')
+
+
+def clear_handler_timings():
+    _records.clear()
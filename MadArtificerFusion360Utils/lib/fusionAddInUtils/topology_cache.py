@@ -0,0 +1,110 @@
+from collections import OrderedDict
+
+import adsk.core
+import adsk.fusion
+
+# Bodies kept in the cache, the least recently used are dropped first
+BODY_CACHE_SIZE = 64
+
+
+class CircleTopology:
+    def __init__(self, edge: adsk.fusion.BRepEdge):
+        self.planar_face = None
+        self.cylindrical_face = None
+        for face in edge.faces:
+            surface_type = face.geometry.surfaceType
+            if surface_type == adsk.core.SurfaceTypes.PlaneSurfaceType:
+                self.planar_face = face
+            elif surface_type == adsk.core.SurfaceTypes.CylinderSurfaceType:
+                self.cylindrical_face = face
+
+        # Axis of the hole, the circle's normal when there is no cylinder to take it from
+        if self.cylindrical_face is not None:
+            axis = self.cylindrical_face.geometry.axis
+        else:
+            axis = edge.geometry.normal
+        self.axis = (axis.x, axis.y, axis.z)
+
+
+class TopologyCache:
+    """Faces and hole axis of circular edges, read once per body revision.
+
+    Bodies are keyed by entity token and their edges are only read again after the body's
+    revisionId changes, so repeated validation events do not query the same faces again.
+
+    Checking the revision costs three calls into Fusion on every lookup. While a session is
+    open edges are trusted by their own token alone, which is one call, so open one only
+    while nothing can modify the design, such as while a command dialog is up.
+    """
+
+    def __init__(self, max_bodies: int = BODY_CACHE_SIZE):
+        self.max_bodies = max_bodies
+        self._bodies = OrderedDict()
+        self._session = None
+
+    def begin_session(self):
+        self._session = dict()
+
+    def end_session(self):
+        self._session = None
+
+    def circle(self, edge: adsk.fusion.BRepEdge) -> CircleTopology:
+        if self._session is None:
+            return self._read_circle(edge)
+
+        edge_token = edge.entityToken
+        topology = self._session.get(edge_token)
+        if topology is None:
+            topology = self._read_circle(edge, edge_token)
+            self._session[edge_token] = topology
+        return topology
+
+    def _read_circle(self, edge: adsk.fusion.BRepEdge, edge_token: str = None) -> CircleTopology:
+        body = edge.body
+        body_token = body.entityToken
+        revision_id = body.revisionId
+
+        entry = self._bodies.get(body_token)
+        if entry is None or entry[0] != revision_id:
+            entry = (revision_id, dict())
+            self._bodies[body_token] = entry
+            while len(self._bodies) > self.max_bodies:
+                self._bodies.popitem(last=False)
+        self._bodies.move_to_end(body_token)
+
+        edges = entry[1]
+        if edge_token is None:
+            edge_token = edge.entityToken
+        topology = edges.get(edge_token)
+        if topology is None:
+            topology = CircleTopology(edge)
+            edges[edge_token] = topology
+        return topology
+
+    def invalidate(self, body: adsk.fusion.BRepBody = None):
+        """Drops one body, or every body and the open session when none is given."""
+        if body is None:
+            self._bodies.clear()
+            self._session = None
+        else:
+            self._bodies.pop(body.entityToken, None)
+
+
+_topology_cache = TopologyCache()
+
+
+def get_circle_topology(circle: adsk.fusion.BRepEdge) -> CircleTopology:
+    return _topology_cache.circle(circle)
+
+
+def clear_topology_cache():
+    _topology_cache.invalidate()
+
+
+def begin_topology_session():
+    """Skips the body revision checks until end_topology_session, while the design cannot change."""
+    _topology_cache.begin_session()
+
+
+def end_topology_session():
+    _topology_cache.end_session()
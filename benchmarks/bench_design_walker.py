@@ -0,0 +1,66 @@
+"""Measures the peak memory of walking a design's parts with tracemalloc.
+
+The scripts used to list design.allComponents and group every part proxy by material before
+doing any work. walk_parts yields the parts one at a time, keeping only the ids of the
+components it has visited and the occurrence iterators of the current branch. The ids still
+grow with the design, so its peak is not flat, but it holds no proxies. The stand-in's proxies
+are far lighter than Fusion's, so the list's peak is an underestimate.
+
+Run from the repository root: python benchmarks/bench_design_walker.py
+"""
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+import stand_in_adsk
+
+stand_in_adsk.install()
+
+from ExportPrintableParts.design_walker import walk_parts
+
+
+def is_part(component):
+    return component.occurrences.count == 0
+
+
+def list_parts(design):
+    # What both scripts did before the walker
+    parts_by_material = defaultdict(list)
+    for component in design.allComponents:
+        if is_part(component):
+            parts_by_material[component.material.name].append(component)
+    return sum(len(parts) for parts in parts_by_material.values())
+
+
+def stream_parts(design):
+    count = 0
+    for _ in walk_parts(design):
+        count += 1
+    return count
+
+
+def peak_memory(function, design) -> tuple:
+    tracemalloc.start()
+    try:
+        result = function(design)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[100, 1000, 10000, 100000], help='Component counts to measure.')
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'list (KiB)':>11} {'walk (KiB)':>11} {'walk B/component':>17}")
+    for size in args.sizes:
+        design = stand_in_adsk.make_assembly(size)
+        _, listed_peak = peak_memory(list_parts, design)
+        _, walked_peak = peak_memory(stream_parts, design)
+        print(f"{size:>10} {listed_peak / 1024:>11.1f} {walked_peak / 1024:>11.1f} {walked_peak / size:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
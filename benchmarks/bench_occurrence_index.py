@@ -0,0 +1,62 @@
+"""Times the part quantities of ExportPrintableParts against the per-part lookups it replaced.
+
+The old export called root_comp.allOccurrencesByComponent(part).count for every part, a walk
+of the whole assembly each. build_occurrence_index walks it once.
+
+Run from the repository root: python benchmarks/bench_occurrence_index.py
+"""
+import argparse
+import time
+
+import stand_in_adsk
+
+stand_in_adsk.install()
+
+from ExportPrintableParts.occurrence_index import build_occurrence_index
+
+# Parts timed with the old lookups, the rest is extrapolated since each lookup costs the same
+OLD_SAMPLE_PARTS = 200
+
+
+def is_part(component):
+    return component.occurrences.count == 0
+
+
+def quantities_per_part(root, parts):
+    return [root.allOccurrencesByComponent(part).count for part in parts]
+
+
+def quantities_from_index(root, parts):
+    index = build_occurrence_index(root)
+    return [index.count(part) for part in parts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[100, 1000, 10000], help='Component counts to time.')
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'parts':>7} {'per part (s)':>13} {'index (s)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        design = stand_in_adsk.make_assembly(size)
+        root = design.rootComponent
+        parts = [component for component in design.allComponents if is_part(component)]
+
+        sample = parts[:OLD_SAMPLE_PARTS]
+        start = time.perf_counter()
+        old = quantities_per_part(root, sample)
+        old_seconds = (time.perf_counter() - start) * len(parts) / len(sample)
+
+        start = time.perf_counter()
+        new = quantities_from_index(root, parts)
+        new_seconds = time.perf_counter() - start
+
+        assert new[:len(sample)] == old, 'the index disagrees with allOccurrencesByComponent'
+        estimated = '*' if len(sample) < len(parts) else ' '
+        print(f"{size:>10} {len(parts):>7} {old_seconds:>12.3f}{estimated} {new_seconds:>10.4f} {old_seconds / new_seconds:>7.0f}x")
+
+    print(f"* extrapolated from the first {OLD_SAMPLE_PARTS} parts")
+
+
+if __name__ == '__main__':
+    main()
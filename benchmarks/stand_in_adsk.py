@@ -0,0 +1,148 @@
+"""A stand-in for the parts of the Fusion API the scripts walk, so their traversals can be
+timed and measured outside Fusion.
+
+Like the real API, every property access returns a new proxy object, and
+allOccurrencesByComponent walks the whole assembly on each call.
+"""
+import os
+import sys
+import types
+
+# The script folders are imported as packages from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _api_class(name):
+    # Only used in annotations of the modules under test
+    return type(name, (), dict())
+
+
+def install():
+    """Puts the stand-in adsk modules in sys.modules, call before importing the scripts."""
+    adsk = types.ModuleType('adsk')
+    core = types.ModuleType('adsk.core')
+    fusion = types.ModuleType('adsk.fusion')
+    core.__getattr__ = _api_class
+    fusion.__getattr__ = _api_class
+    adsk.core, adsk.fusion = core, fusion
+    sys.modules.update({'adsk': adsk, 'adsk.core': core, 'adsk.fusion': fusion})
+
+
+class Collection:
+    def __init__(self, items):
+        self._items = items
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class Material:
+    def __init__(self, name):
+        self.name = name
+
+
+class ComponentData:
+    def __init__(self, component_id, name, material):
+        self.id = component_id
+        self.name = name
+        self.material = material
+        # (occurrence name, ComponentData) of every occurrence in the component
+        self.occurrences = list()
+
+
+class Component:
+    def __init__(self, data: ComponentData):
+        self._data = data
+
+    @property
+    def id(self):
+        return self._data.id
+
+    @property
+    def name(self):
+        return self._data.name
+
+    @property
+    def material(self):
+        return Material(self._data.material)
+
+    @property
+    def occurrences(self):
+        return Collection([Occurrence(name, data) for name, data in self._data.occurrences])
+
+    def allOccurrencesByComponent(self, component):
+        found = list()
+        stack = [self.occurrences]
+        while stack:
+            for occurrence in stack.pop():
+                if occurrence.component.id == component.id:
+                    found.append(occurrence)
+                stack.append(occurrence.childOccurrences)
+        return Collection(found)
+
+
+class Occurrence:
+    def __init__(self, name, data: ComponentData):
+        self._name = name
+        self._data = data
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def component(self):
+        return Component(self._data)
+
+    @property
+    def childOccurrences(self):
+        return Collection([Occurrence(name, data) for name, data in self._data.occurrences])
+
+
+class Design:
+    def __init__(self, root: ComponentData, components: list):
+        self._root = root
+        self._components = components
+
+    @property
+    def rootComponent(self):
+        return Component(self._root)
+
+    @property
+    def allComponents(self):
+        return Collection([Component(data) for data in self._components])
+
+
+def make_assembly(num_components: int) -> Design:
+    """Builds a printer-like assembly with about num_components components.
+
+    A tenth of the components are subassemblies nested as a binary tree, each holding nine
+    part occurrences. Parts are shared between subassemblies and one fastener is used in
+    every one of them, so quantities above one are common.
+    """
+    num_subassemblies = max(1, num_components // 10)
+    num_parts = max(1, num_components - num_subassemblies)
+
+    materials = ('PLA Plastic', 'PETG Plastic', 'Steel', 'Aluminum')
+    parts = [ComponentData(f'part{i}', f'Part {i}', materials[i % len(materials)]) for i in range(num_parts)]
+    subassemblies = [ComponentData(f'assembly{i}', f'Assembly {i}', 'Default') for i in range(num_subassemblies)]
+
+    for i, subassembly in enumerate(subassemblies):
+        subassembly.occurrences.append((f'{parts[0].name}:{i}', parts[0]))
+        for j in range(1, 9):
+            part = parts[(i * 8 + j) % num_parts]
+            subassembly.occurrences.append((f'{part.name}:{i}', part))
+        for child in (2 * i + 1, 2 * i + 2):
+            if child < num_subassemblies:
+                subassembly.occurrences.append((f'{subassemblies[child].name}:1', subassemblies[child]))
+
+    root = ComponentData('root', 'Root', 'Default')
+    root.occurrences.append((f'{subassemblies[0].name}:1', subassemblies[0]))
+    return Design(root, [root] + subassemblies + parts)
@@ -0,0 +1,91 @@
+"""A stand-in for the parts of the Fusion API the add-in's utilities use at import and in
+their event plumbing, so they can be tested outside Fusion."""
+import sys
+import types
+
+
+class CustomEventHandler:
+    def __init__(self):
+        pass
+
+
+class CustomEvent:
+    def __init__(self):
+        self.handlers = list()
+
+    def add(self, handler: 'CustomEventHandler'):
+        self.handlers.append(handler)
+
+
+# add_handler looks the handler class up in the event's module
+CustomEvent.__module__ = 'adsk.core'
+
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class Application:
+    """Stands in for Fusion: fired custom events wait until idle() is called."""
+
+    def __init__(self):
+        self.userInterface = None
+        self.events = dict()
+        self.fired = list()
+        self.logged = list()
+
+    def log(self, message, level, log_type):
+        self.logged.append(message)
+
+    def registerCustomEvent(self, event_id):
+        self.events[event_id] = CustomEvent()
+        return self.events[event_id]
+
+    def unregisterCustomEvent(self, event_id):
+        self.events.pop(event_id, None)
+
+    def fireCustomEvent(self, event_id):
+        self.fired.append(event_id)
+
+    def idle(self):
+        fired, self.fired = self.fired, list()
+        for event_id in fired:
+            for handler in self.events[event_id].handlers:
+                handler.notify(None)
+        return len(fired)
+
+
+def _api_class(name):
+    # Only used in annotations of the modules under test
+    return type(name, (), dict())
+
+
+def install_adsk() -> Application:
+    """Puts the stand-in adsk modules in sys.modules, call before importing the add-in."""
+    application = Application()
+    adsk = types.ModuleType('adsk')
+    core = types.ModuleType('adsk.core')
+    fusion = types.ModuleType('adsk.fusion')
+    core.Application = types.SimpleNamespace(get=lambda: application)
+    core.CustomEventHandler = CustomEventHandler
+    core.LogLevels = LogLevels
+    core.LogTypes = LogTypes
+    core.__getattr__ = _api_class
+    fusion.__getattr__ = _api_class
+    adsk.core, adsk.fusion = core, fusion
+    sys.modules.update({'adsk': adsk, 'adsk.core': core, 'adsk.fusion': fusion})
+    return application
+
+
+def uninstall_adsk():
+    """Drops the stand-in and every add-in module imported with it."""
+    for name in list(sys.modules):
+        if name == 'adsk' or name.startswith(('adsk.', 'MadArtificerFusion360Utils')):
+            del sys.modules[name]
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stand_in_adsk import CustomEvent, LogLevels, install_adsk, uninstall_adsk
+
+
+app = None
+futil = None
+
+
+def setUpModule():
+    global app, futil
+    app = install_adsk()
+    from MadArtificerFusion360Utils.lib import fusionAddInUtils
+    futil = fusionAddInUtils
+
+
+def tearDownModule():
+    futil.clear_handlers()
+    uninstall_adsk()
+
+
+class DeferredHandlerTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = list()
+
+    def tearDown(self):
+        futil.clear_handlers()
+        app.idle()
+
+    def record(self, args):
+        self.calls.append(args)
+
+    def test_burst_runs_once_with_latest_args(self):
+        event = CustomEvent()
+        futil.add_deferred_handler(event, self.record, name='burst', local_handlers=list())
+        for args in ('first', 'second', 'third'):
+            event.handlers[0].notify(args)
+
+        # Nothing runs inside the events, and the burst fires a single custom event
+        self.assertEqual(self.calls, [])
+        self.assertEqual(app.idle(), 1)
+        self.assertEqual(self.calls, ['third'])
+
+        # A later event runs it again
+        event.handlers[0].notify('fourth')
+        app.idle()
+        self.assertEqual(self.calls, ['third', 'fourth'])
+
+    def test_handlers_due_together_share_one_event(self):
+        other_calls = list()
+        first = futil.DeferredHandler(self.record)
+        second = futil.DeferredHandler(other_calls.append)
+        first.schedule('a')
+        second.schedule('b')
+
+        self.assertEqual(app.idle(), 1)
+        self.assertEqual((self.calls, other_calls), (['a'], ['b']))
+
+    def test_debounce_waits_for_quiet(self):
+        deferred = futil.DeferredHandler(self.record, delay=0.2)
+        deferred.schedule('first')
+        time.sleep(0.1)
+        deferred.schedule('second')
+
+        # The second event restarted the timer
+        time.sleep(0.15)
+        self.assertEqual(app.idle(), 0)
+
+        time.sleep(0.2)
+        self.assertEqual(app.idle(), 1)
+        self.assertEqual(self.calls, ['second'])
+
+    def test_debounce_restarts_when_already_due(self):
+        deferred = futil.DeferredHandler(self.record, delay=0.1)
+        deferred.schedule('first')
+        time.sleep(0.2)
+
+        # Due but not yet run when the next event comes in, which restarts the wait
+        deferred.schedule('second')
+        self.assertEqual(app.idle(), 1)
+        self.assertEqual(self.calls, [])
+
+        time.sleep(0.2)
+        app.idle()
+        self.assertEqual(self.calls, ['second'])
+
+        # Nothing is left to run a second time
+        time.sleep(0.2)
+        self.assertEqual(app.idle(), 0)
+        self.assertEqual(self.calls, ['second'])
+
+    def test_none_args_are_passed_on(self):
+        deferred = futil.DeferredHandler(self.record)
+        deferred.schedule(None)
+        app.idle()
+        self.assertEqual(self.calls, [None])
+
+    def test_cancel_drops_pending_call(self):
+        debounced = futil.DeferredHandler(self.record, delay=0.05)
+        debounced.schedule('debounced')
+        debounced.cancel()
+        time.sleep(0.1)
+
+        immediate = futil.DeferredHandler(self.record)
+        immediate.schedule('immediate')
+        immediate.cancel()
+
+        app.idle()
+        self.assertEqual(self.calls, [])
+
+    def test_clear_handlers_cancels_pending_calls(self):
+        deferred = futil.DeferredHandler(self.record, delay=0.05)
+        deferred.schedule('pending')
+        futil.clear_handlers()
+        time.sleep(0.1)
+
+        self.assertEqual(app.fired, [])
+        self.assertEqual(self.calls, [])
+
+
+class LogTest(unittest.TestCase):
+    def setUp(self):
+        self.general_utils = futil.general_utils
+        app.logged.clear()
+
+    def tearDown(self):
+        self.general_utils.flush_log()
+        self.general_utils._idle_flush = True
+        self.general_utils.LOG_LEVEL = LogLevels.InfoLogLevel
+        futil.clear_handlers()
+        app.idle()
+
+    def test_messages_are_flushed_at_idle(self):
+        futil.log('buffered', force_console=True)
+        self.assertEqual(app.logged, [])
+        app.idle()
+        self.assertEqual(app.logged, ['buffered'])
+
+    def test_filtered_messages_are_not_built(self):
+        self.general_utils.LOG_LEVEL = LogLevels.WarningLogLevel
+        futil.log(lambda: self.fail('message built below the log level'))
+        self.assertEqual(self.general_utils._log_buffer, [])
+
+    def test_messages_after_close_are_written_right_away(self):
+        futil.close_log()
+        futil.log('late', force_console=True)
+        self.assertEqual(self.general_utils._log_buffer, [])
+        self.assertEqual(app.logged, ['late'])
+
+
+if __name__ == '__main__':
+    unittest.main()
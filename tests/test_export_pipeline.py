@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ExportPrintableParts.export_pipeline import run_export_pipeline
+
+
+class ExportPipelineTest(unittest.TestCase):
+    def test_writes_every_job(self):
+        written = dict()
+        lock = threading.Lock()
+
+        def write_mesh(mesh, target):
+            time.sleep(0.001)
+            with lock:
+                written[target] = mesh
+
+        jobs = [(part, f"part{part}") for part in range(20)]
+        count = run_export_pipeline(jobs, lambda part: part * 2, write_mesh, workers=4, max_pending=3)
+
+        self.assertEqual(count, 20)
+        self.assertEqual(written, {f"part{part}": part * 2 for part in range(20)})
+
+    def test_extracts_on_calling_thread(self):
+        threads = set()
+
+        def extract_mesh(part):
+            threads.add(threading.current_thread())
+            return part
+
+        run_export_pipeline([(part, part) for part in range(5)], extract_mesh, lambda mesh, target: None, workers=2)
+        self.assertEqual(threads, {threading.current_thread()})
+
+    def test_single_worker_writes_in_order(self):
+        order = list()
+        run_export_pipeline([(part, part) for part in range(10)], lambda part: part, lambda mesh, target: order.append(target), workers=1)
+        self.assertEqual(order, list(range(10)))
+
+    def test_bounds_pending_meshes(self):
+        extracted = list()
+        max_ahead = [0]
+        done = [0]
+        lock = threading.Lock()
+
+        def extract_mesh(part):
+            with lock:
+                max_ahead[0] = max(max_ahead[0], len(extracted) - done[0])
+            extracted.append(part)
+            return part
+
+        def write_mesh(mesh, target):
+            time.sleep(0.002)
+            with lock:
+                done[0] += 1
+
+        run_export_pipeline([(part, part) for part in range(20)], extract_mesh, write_mesh, workers=1, max_pending=3)
+        self.assertLessEqual(max_ahead[0], 3)
+
+    def test_cancel_reports_written_prefix(self):
+        progress = list()
+        count = run_export_pipeline(
+            [(part, part) for part in range(10)],
+            lambda part: part,
+            lambda mesh, target: None,
+            workers=2,
+            on_progress=progress.append,
+            is_cancelled=lambda: len(progress) >= 4
+        )
+        self.assertEqual(count, 4)
+        self.assertEqual(progress, [1, 2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
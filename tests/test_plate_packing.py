@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ExportPrintableParts.plate_packing import pack_plates
+
+EPSILON = 1e-9
+
+
+def overlaps(first, second, spacing):
+    return (
+        first.x < second.x + second.width + spacing - EPSILON and
+        second.x < first.x + first.width + spacing - EPSILON and
+        first.y < second.y + second.depth + spacing - EPSILON and
+        second.y < first.y + first.depth + spacing - EPSILON
+    )
+
+
+class PackPlatesTest(unittest.TestCase):
+    def check_plates(self, plates, width, depth, spacing):
+        for plate in plates:
+            for placement in plate.placements:
+                self.assertGreaterEqual(placement.x, 0.0)
+                self.assertGreaterEqual(placement.y, 0.0)
+                self.assertLessEqual(placement.x + placement.width, width + EPSILON)
+                self.assertLessEqual(placement.y + placement.depth, depth + EPSILON)
+
+            placements = plate.placements
+            for i, first in enumerate(placements):
+                for second in placements[i + 1:]:
+                    self.assertFalse(overlaps(first, second, 0.0), (first.__dict__, second.__dict__))
+                    if spacing > 0:
+                        gap_x = max(second.x - (first.x + first.width), first.x - (second.x + second.width))
+                        gap_y = max(second.y - (first.y + first.depth), first.y - (second.y + second.depth))
+                        self.assertGreaterEqual(max(gap_x, gap_y), spacing - EPSILON)
+
+    def test_random_rectangles_do_not_overlap(self):
+        generator = random.Random(7)
+        rectangles = [(i, generator.uniform(5, 80), generator.uniform(5, 80)) for i in range(200)]
+
+        plates, too_large = pack_plates(rectangles, 220.0, 220.0, 2.0)
+
+        self.assertEqual(too_large, [])
+        self.check_plates(plates, 220.0, 220.0, 2.0)
+        placed = sorted(placement.key for plate in plates for placement in plate.placements)
+        self.assertEqual(placed, list(range(200)))
+
+    def test_reports_real_sizes(self):
+        plates, _ = pack_plates([("a", 10.0, 20.0)], 100.0, 100.0, 5.0)
+        placement = plates[0].placements[0]
+        self.assertEqual((placement.x, placement.y, placement.width, placement.depth), (0.0, 0.0, 10.0, 20.0))
+
+    def test_fills_plate_before_opening_another(self):
+        plates, _ = pack_plates([(i, 50.0, 50.0) for i in range(4)], 100.0, 100.0)
+        self.assertEqual(len(plates), 1)
+
+        plates, _ = pack_plates([(i, 50.0, 50.0) for i in range(5)], 100.0, 100.0)
+        self.assertEqual(len(plates), 2)
+
+    def test_too_large(self):
+        plates, too_large = pack_plates([("big", 300.0, 10.0), ("small", 10.0, 10.0)], 220.0, 220.0)
+        self.assertEqual(too_large, ["big"])
+        self.assertEqual([placement.key for plate in plates for placement in plate.placements], ["small"])
+
+
+if __name__ == "__main__":
+    unittest.main()
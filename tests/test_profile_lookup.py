@@ -0,0 +1,82 @@
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stand_in_adsk import install_adsk, uninstall_adsk
+
+futil = None
+
+
+def setUpModule():
+    global futil
+    install_adsk()
+    from MadArtificerFusion360Utils.lib import fusionAddInUtils
+    futil = fusionAddInUtils
+
+
+def tearDownModule():
+    uninstall_adsk()
+
+
+class Collection(list):
+    @property
+    def count(self):
+        return len(self)
+
+
+def curve(token):
+    return types.SimpleNamespace(entityToken=token)
+
+
+def profile(*loops):
+    return types.SimpleNamespace(profileLoops=Collection(
+        types.SimpleNamespace(profileCurves=Collection(types.SimpleNamespace(sketchEntity=c) for c in loop)) for loop in loops
+    ))
+
+
+class ProfileLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.circle, self.line1, self.line2, self.line3 = (curve(token) for token in ('circle', 'line1', 'line2', 'line3'))
+        # The circle is split into two arcs by the lines, both arcs bound the second profile
+        self.split = profile([self.circle, self.line1, self.line2])
+        self.twice = profile([self.circle, self.circle, self.line1, self.line2])
+        self.square = profile([self.line1, self.line2, self.line3])
+        self.sketch = types.SimpleNamespace(entityToken='sketch', revisionId='1', profiles=Collection([self.twice, self.split, self.square]))
+        futil.general_utils._profile_index = None
+
+    def tearDown(self):
+        futil.general_utils._profile_index = None
+
+    def lookups(self, bounds):
+        # Without an index, then through the index built for the batch
+        linear = futil.get_profile_from_sketch_bounds(self.sketch, bounds)
+        batch = futil.get_profiles_from_sketch_bounds(self.sketch, [bounds])[0]
+        cached = futil.get_profile_from_sketch_bounds(self.sketch, bounds)
+        futil.general_utils._profile_index = None
+        return linear, batch, cached
+
+    def test_paths_agree(self):
+        for bounds, expected in (
+            ([self.circle, self.line1, self.line2], self.split),
+            ([self.circle, self.circle, self.line1, self.line2], self.twice),
+            ([self.line3, self.line2, self.line1], self.square),
+            ([self.circle, self.line3], None),
+            ([self.line1, self.line2], None),
+        ):
+            for result in self.lookups(bounds):
+                self.assertIs(result, expected)
+
+    def test_index_is_rebuilt_when_the_sketch_changes(self):
+        bounds = [self.line1, self.line2, self.line3]
+        futil.get_profiles_from_sketch_bounds(self.sketch, [bounds])
+        self.sketch.profiles = Collection([self.twice])
+        self.sketch.revisionId = '2'
+        self.assertIsNone(futil.get_profiles_from_sketch_bounds(self.sketch, [bounds])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import gzip
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ExportPrintableParts import stl_writer
+
+
+def struct_records(coordinates, normals, indices, scale):
+    # Straightforward per triangle packing the writer has to match
+    records = bytearray()
+    for triangle in range(len(indices) // 3):
+        corners = indices[triangle * 3:triangle * 3 + 3]
+        normal = normals[corners[0] * 3:corners[0] * 3 + 3]
+        vertices = list()
+        for corner in corners:
+            vertices.extend(value * scale for value in coordinates[corner * 3:corner * 3 + 3])
+        records += struct.pack("<12fH", *normal, *vertices, 0)
+    return records
+
+
+class MeshRecordsTest(unittest.TestCase):
+    def setUp(self):
+        self.coordinates = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+        self.normals = [0.0, 0.0, -1.0, 0.0, -1.0, 0.0, -1.0, 0.0, 0.0, 0.57, 0.57, 0.57]
+        self.indices = [0, 2, 1, 0, 1, 3, 0, 3, 2, 1, 2, 3]
+
+    def test_matches_struct_packing(self):
+        records = stl_writer.mesh_records(self.coordinates, self.normals, self.indices, 10.0)
+        self.assertEqual(len(records), 4 * 50)
+        self.assertEqual(bytes(records), bytes(struct_records(self.coordinates, self.normals, self.indices, 10.0)))
+
+    def test_record_layout(self):
+        records = stl_writer.mesh_records(self.coordinates, self.normals, self.indices, 10.0)
+        values = struct.unpack_from("<12fH", records, 50)
+        self.assertEqual(values[:3], (0.0, 0.0, -1.0))
+        self.assertEqual(values[3:12], (0.0, 0.0, 0.0, 10.0, 0.0, 0.0, 0.0, 0.0, 10.0))
+        self.assertEqual(values[12], 0)
+
+    def test_ignores_incomplete_triangle(self):
+        records = stl_writer.mesh_records(self.coordinates, self.normals, self.indices + [0, 1], 1.0)
+        self.assertEqual(len(records), 4 * 50)
+
+    def test_empty_mesh(self):
+        self.assertEqual(len(stl_writer.mesh_records([], [], [], 1.0)), 0)
+
+
+class WriteBinaryStlTest(unittest.TestCase):
+    def test_header_and_count(self):
+        mesh = ([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 1.0] * 3, [0, 1, 2])
+        for compress in (False, True):
+            with tempfile.TemporaryDirectory() as folder:
+                filename = os.path.join(folder, "part.stl")
+                stl_writer.write_binary_stl(filename, [mesh, mesh], compress=compress)
+                if compress:
+                    with gzip.open(filename) as stl_file:
+                        data = stl_file.read()
+                else:
+                    with open(filename, "rb") as stl_file:
+                        data = stl_file.read()
+
+            self.assertEqual(len(data), 84 + 2 * 50)
+            self.assertEqual(struct.unpack_from("<I", data, 80)[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
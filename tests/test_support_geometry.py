@@ -0,0 +1,130 @@
+import math
+import os
+import sys
+import unittest
+
+# The command package imports the Fusion API, the geometry module does not
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MadArtificerFusion360Utils", "commands", "unsupportedHole"))
+
+import support_geometry
+
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1]
+
+
+def sub(a, b):
+    return (a[0] - b[0], a[1] - b[1])
+
+
+def cross(a, b):
+    return a[0] * b[1] - a[1] * b[0]
+
+
+def polygon_lines(center, hole_radius, outer_radius, num_layers):
+    """The lines the solver used to place: the sides of a regular polygon with 2 * num_layers
+    sides around the hole, the first one horizontal, each extended to the outer circle."""
+    cx, cy = center
+    num_sides = num_layers * 2
+    vertex_radius = hole_radius / math.cos(math.pi / num_sides)
+    vertices = list()
+    for k in range(num_sides):
+        angle = -math.pi / 2 - math.pi / num_sides + k * 2 * math.pi / num_sides
+        vertices.append((cx + vertex_radius * math.cos(angle), cy + vertex_radius * math.sin(angle)))
+
+    lines = list()
+    for k in range(num_sides):
+        start, end = vertices[k], vertices[(k + 1) % num_sides]
+        direction = sub(end, start)
+        # Solve |start + t * direction - center| = outer_radius
+        offset = sub(start, center)
+        a = dot(direction, direction)
+        b = 2 * dot(offset, direction)
+        c = dot(offset, offset) - outer_radius * outer_radius
+        root = math.sqrt(b * b - 4 * a * c)
+        t1, t2 = (-b - root) / (2 * a), (-b + root) / (2 * a)
+        lines.append(((start[0] + t1 * direction[0], start[1] + t1 * direction[1]),
+                      (start[0] + t2 * direction[0], start[1] + t2 * direction[1])))
+    return [(lines[i], lines[num_layers + i]) for i in range(num_layers)]
+
+
+class SupportLinesTest(unittest.TestCase):
+    def assertSamePoint(self, a, b):
+        self.assertAlmostEqual(a[0], b[0])
+        self.assertAlmostEqual(a[1], b[1])
+
+    def assertSameLine(self, a, b):
+        # Lines are compared without regard to their direction
+        if math.hypot(*sub(a[0], b[0])) > math.hypot(*sub(a[0], b[1])):
+            b = (b[1], b[0])
+        self.assertSamePoint(a[0], b[0])
+        self.assertSamePoint(a[1], b[1])
+
+    def test_chords_are_tangent_to_the_hole(self):
+        center, hole_radius, outer_radius, num_layers = (2.0, -1.0), 0.4, 1.5, 3
+        layers = support_geometry.support_lines(center, hole_radius, outer_radius, num_layers)
+        self.assertEqual(len(layers), num_layers)
+
+        for i, pair in enumerate(layers):
+            for start, end in pair:
+                # Both ends lie on the outer circle
+                self.assertAlmostEqual(math.hypot(*sub(start, center)), outer_radius)
+                self.assertAlmostEqual(math.hypot(*sub(end, center)), outer_radius)
+                # The line is at hole_radius from the center
+                direction = sub(end, start)
+                self.assertAlmostEqual(abs(cross(direction, sub(center, start))) / math.hypot(*direction), hole_radius)
+
+            # The lines of a pair are parallel and on opposite sides of the hole
+            (start1, end1), (start2, end2) = pair
+            direction1, direction2 = sub(end1, start1), sub(end2, start2)
+            self.assertAlmostEqual(cross(direction1, direction2), 0.0)
+            self.assertLess(cross(direction1, sub(center, start1)) * cross(direction2, sub(center, start2)), 0.0)
+
+            # Each layer is turned by 180 / num_layers degrees, starting horizontal
+            angle = math.atan2(direction1[1], direction1[0]) % math.pi
+            self.assertAlmostEqual(angle, (i * math.pi / num_layers) % math.pi)
+
+    def test_matches_polygon_construction(self):
+        # A single layer has no polygon to compare with, two sides do not make one
+        for num_layers in (2, 3, 5):
+            center, hole_radius, outer_radius = (-0.5, 3.0), 0.25, 0.9
+            layers = support_geometry.support_lines(center, hole_radius, outer_radius, num_layers)
+            expected = polygon_lines(center, hole_radius, outer_radius, num_layers)
+            for pair, expected_pair in zip(layers, expected):
+                first, second = pair
+                if math.hypot(*sub(first[0], expected_pair[0][0])) > 1e-6 and math.hypot(*sub(first[1], expected_pair[0][0])) > 1e-6:
+                    first, second = second, first
+                self.assertSameLine(first, expected_pair[0])
+                self.assertSameLine(second, expected_pair[1])
+
+    def test_outer_circle_must_be_larger(self):
+        with self.assertRaises(ValueError):
+            support_geometry.support_lines((0.0, 0.0), 1.0, 1.0, 2)
+
+
+class ProfileLayersTest(unittest.TestCase):
+    def hole(self, center, hole_radius, outer_radius, num_layers):
+        strips = list()
+        for (start, end), (other, _) in support_geometry.support_lines(center, hole_radius, outer_radius, num_layers):
+            strips.append(support_geometry.line_strip(start, end, other))
+        return center, outer_radius, strips
+
+    def test_layers_of_two_holes(self):
+        # With two layers the first strip is horizontal and the second vertical
+        holes = [self.hole((0.0, 0.0), 1.0, 4.0, 2), self.hole((10.0, 0.0), 1.0, 4.0, 2)]
+        centroids = [
+            (0.0, 0.0),     # inside the hole
+            (0.0, 3.0),     # only outside the horizontal strip
+            (3.0, 0.0),     # only outside the vertical strip
+            (2.0, 2.0),     # outside both, the taller layer covers it
+            (5.0, 0.0),     # outside every outer circle
+            (10.0, -3.0),   # second hole, outside the horizontal strip
+        ]
+        self.assertEqual(support_geometry.profile_layers(centroids, holes), [-1, 0, 1, 1, -1, 0])
+
+    def test_no_holes(self):
+        self.assertEqual(support_geometry.profile_layers([(1.0, 1.0)], list()), [-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import math
+import os
+import sys
+import unittest
+
+# The command package imports the Fusion API, the geometry module does not
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MadArtificerFusion360Utils", "commands", "teardropCreator"))
+
+import teardrop_geometry
+
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1]
+
+
+def sub(a, b):
+    return (a[0] - b[0], a[1] - b[1])
+
+
+class TeardropPointsTest(unittest.TestCase):
+    def check_teardrop(self, center, radius, axis, flip=False, apex_angle=teardrop_geometry.DEFAULT_APEX_ANGLE):
+        apex, tangent1, tangent2 = teardrop_geometry.teardrop_points(center, radius, axis, flip, apex_angle)
+
+        for tangent in (tangent1, tangent2):
+            # On the circle
+            self.assertAlmostEqual(math.hypot(*sub(tangent, center)), radius)
+            # Tangent: the line from the apex is perpendicular to the radius
+            self.assertAlmostEqual(dot(sub(tangent, apex), sub(tangent, center)), 0.0)
+
+        # The lines meet at the apex angle
+        side1, side2 = sub(tangent1, apex), sub(tangent2, apex)
+        self.assertAlmostEqual(math.acos(dot(side1, side2) / (math.hypot(*side1) * math.hypot(*side2))), apex_angle)
+
+        # The apex lies on the axis through the center, on the requested side
+        to_apex = sub(apex, center)
+        self.assertAlmostEqual(to_apex[0] * axis[1] - to_apex[1] * axis[0], 0.0)
+        self.assertEqual(dot(to_apex, axis) < 0, flip)
+        return apex, tangent1, tangent2
+
+    def test_default_apex_is_perpendicular(self):
+        apex, tangent1, tangent2 = self.check_teardrop((1.0, 2.0), 0.5, (0.0, 3.0))
+        self.assertAlmostEqual(dot(sub(tangent1, apex), sub(tangent2, apex)), 0.0)
+        self.assertAlmostEqual(apex[0], 1.0)
+        self.assertAlmostEqual(apex[1], 2.0 + 0.5 * math.sqrt(2))
+
+    def test_slanted_axis_and_flip(self):
+        self.check_teardrop((-3.0, 4.0), 1.25, (1.0, -2.0))
+        self.check_teardrop((-3.0, 4.0), 1.25, (1.0, -2.0), flip=True)
+
+    def test_other_apex_angle(self):
+        self.check_teardrop((0.0, 0.0), 2.0, (1.0, 1.0), apex_angle=math.radians(60))
+
+    def test_zero_axis(self):
+        with self.assertRaises(ValueError):
+            teardrop_geometry.teardrop_points((0.0, 0.0), 1.0, (0.0, 0.0))
+
+
+class DirectionTest(unittest.TestCase):
+    def test_opposite_directions_share_a_key(self):
+        self.assertEqual(teardrop_geometry.direction_key((0.0, 0.0, 2.0)), teardrop_geometry.direction_key((0.0, -0.0, -1.0)))
+        self.assertEqual(teardrop_geometry.direction_key((1.0, -1.0, 0.0)), teardrop_geometry.direction_key((-3.0, 3.0, 0.0)))
+
+    def test_perpendicular_directions(self):
+        directions = [
+            teardrop_geometry.direction_key(direction)
+            for direction in ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 1.0), (1.0, 1.0, 0.00001))
+        ]
+        perpendicular = teardrop_geometry.perpendicular_directions(directions, (0.0, 0.0, -5.0))
+        self.assertEqual(perpendicular, [directions[0], directions[1], directions[4]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ExportPrintableParts.threemf_writer import ThreeMFWriter
+
+NAMESPACE = {"m": "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"}
+
+
+class ThreeMFWriterTest(unittest.TestCase):
+    def write_and_read(self, fill):
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "parts.3mf")
+            with ThreeMFWriter(filename) as writer:
+                fill(writer)
+            with zipfile.ZipFile(filename) as archive:
+                names = archive.namelist()
+                model = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+        return names, model
+
+    def test_round_trip(self):
+        triangle = ([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 1.0] * 3, [0, 1, 2])
+        offset_triangle = ([0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 0.0, 1.0, 1.0], [0.0, 0.0, 1.0] * 3, [0, 2, 1])
+
+        names, model = self.write_and_read(lambda writer: writer.add_object("Bracket & <Clip>", [triangle, offset_triangle], 3))
+
+        self.assertIn("[Content_Types].xml", names)
+        self.assertIn("_rels/.rels", names)
+
+        objects = model.findall("m:resources/m:object", NAMESPACE)
+        self.assertEqual(len(objects), 1)
+        self.assertEqual(objects[0].get("name"), "Bracket & <Clip>")
+
+        vertices = [
+            (float(vertex.get("x")), float(vertex.get("y")), float(vertex.get("z")))
+            for vertex in objects[0].findall("m:mesh/m:vertices/m:vertex", NAMESPACE)
+        ]
+        self.assertEqual(len(vertices), 6)
+        # Centimeters are written as millimeters
+        self.assertEqual(vertices[4], (10.0, 0.0, 10.0))
+
+        triangles = [
+            (int(triangle.get("v1")), int(triangle.get("v2")), int(triangle.get("v3")))
+            for triangle in objects[0].findall("m:mesh/m:triangles/m:triangle", NAMESPACE)
+        ]
+        # The second body's indices follow the first body's vertices
+        self.assertEqual(triangles, [(0, 1, 2), (3, 5, 4)])
+
+        items = model.findall("m:build/m:item", NAMESPACE)
+        self.assertEqual([item.get("objectid") for item in items], [objects[0].get("id")] * 3)
+
+    def test_items_with_transform(self):
+        triangle = ([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 1.0] * 3, [0, 1, 2])
+
+        def fill(writer):
+            object_id = writer.add_object("part", [triangle], 0)
+            writer.add_item(object_id, (1, 0, 0, 0, 1, 0, 0, 0, 1, 5, 6, 0))
+
+        _, model = self.write_and_read(fill)
+        items = model.findall("m:build/m:item", NAMESPACE)
+        self.assertEqual(len(items), 1)
+        self.assertEqual([float(value) for value in items[0].get("transform").split()], [1, 0, 0, 0, 1, 0, 0, 0, 1, 5, 6, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()